@@ -0,0 +1,70 @@
+"""Compare Chart.to_vega_inline_data() against the old row-by-row builder.
+
+Usage: python benchmarks/bench_inline_data.py [N_ROWS] [N_SERIES]
+"""
+
+import json
+import sys
+import timeit
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from linechart import Chart, XSeries, YSeries  # noqa: E402
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+
+def legacy_to_vega_inline_data(chart):
+    """The pre-vectorization implementation, kept for comparison."""
+    datasets = {"x": chart.x_series.json_compatible_values}
+    for i, y_series in enumerate(chart.y_serieses):
+        datasets[f"y{i}"] = y_series.series
+    return [
+        {k: None if pd.isnull(v) else v for k, v in record.items()}
+        for record in pd.DataFrame(datasets).to_dict(orient="records")
+    ]
+
+
+def build_chart(n_rows: int, n_series: int) -> Chart:
+    rng = np.random.default_rng(0)
+    x_series = XSeries(
+        pd.Series(np.arange(n_rows, dtype=np.float64), name="x"),
+        Column("x", "number", "{:,}"),
+    )
+    y_serieses = []
+    for i in range(n_series):
+        values = rng.standard_normal(n_rows)
+        values[rng.random(n_rows) < 0.1] = np.nan  # 10% nulls
+        y_serieses.append(YSeries(pd.Series(values, name=f"y{i}"), "#000000", "{:,}"))
+    return Chart(
+        title="",
+        x_axis_label="",
+        x_axis_tick_format=",r",
+        y_axis_label="",
+        x_series=x_series,
+        y_serieses=y_serieses,
+        y_axis_tick_format=",r",
+    )
+
+
+def main(n_rows: int = 500_000, n_series: int = 8) -> None:
+    chart = build_chart(n_rows, n_series)
+    # Output must be byte-for-byte identical
+    assert json.dumps(chart.to_vega_inline_data()) == json.dumps(
+        legacy_to_vega_inline_data(chart)
+    )
+
+    legacy = min(timeit.repeat(lambda: legacy_to_vega_inline_data(chart), number=1))
+    vectorized = min(timeit.repeat(chart.to_vega_inline_data, number=1))
+    print(f"{n_rows} rows x {n_series} series")
+    print(f"  legacy:     {legacy:.3f}s")
+    print(f"  vectorized: {vectorized:.3f}s ({legacy / vectorized:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
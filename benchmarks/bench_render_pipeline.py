@@ -0,0 +1,362 @@
+"""Time each stage of the render pipeline on synthetic tables.
+
+Usage:
+
+    python benchmarks/bench_render_pipeline.py [options] [--output FILE]
+    python benchmarks/bench_render_pipeline.py compare OLD.json NEW.json
+
+The first form builds a table for every combination of --sizes, --series,
+--x-types, --spacings and --null-densities, times each pipeline stage on its
+own and writes a JSON file (default: benchmark-results.json). Run it on two
+commits and `compare` the files to find which stage regressed. Pass
+--linechart-dir to benchmark the linechart.py of another checkout (say, a
+`git worktree` of an older commit) with this script.
+
+Stages:
+
+    make_x_series_and_mask         Form._make_x_series_and_mask()
+    make_chart                     Form.make_chart() (X, then Y masking)
+    timestamp_tick_values_and_format  (timestamp X only)
+    to_vega_inline_data            Chart.to_vega_inline_data()
+    to_vega                        Chart.to_vega(data=...): the spec, sans data
+    json_dumps                     json.dumps(spec)
+    to_vega_json_chunks            b"".join(Chart.to_vega_json_chunks())
+
+Stages whose API the benchmarked linechart.py lacks (older commits have no
+`Chart.to_vega(data=...)` or `Chart.to_vega_json_chunks()`, for instance) are
+recorded with "absent": true, and `compare` skips them.
+
+Text X is capped at MaxNAxisLabels rows, since we cannot chart more. Temporal
+X values repeat when there are more rows than periods fit in the timestamp
+range. Combinations with more than --max-cells values are skipped.
+"""
+
+import argparse
+import datetime
+import importlib
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+# Most distinct periods per spacing: all must fit in datetime64[ns]
+MAX_PERIODS = {"daily": 100_000, "weekly": 14_000, "monthly": 3_000}
+SPACINGS = {
+    "number": ["regular", "irregular"],
+    "text": ["n/a"],
+    "date": ["daily", "weekly", "monthly", "irregular"],
+    "timestamp": ["daily", "weekly", "monthly", "irregular"],
+}
+CASE_KEYS = ("n_rows", "n_series", "x_type", "spacing", "null_density")
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(",")]
+
+
+def _str_list(value):
+    return value.split(",")
+
+
+def build_x_days(n_rows, spacing, rng):
+    """Return sorted int64 days since the epoch (midnight UTC)."""
+    if spacing == "irregular":
+        n_periods = min(n_rows, 20_000)
+        periods = np.cumsum(rng.integers(1, 11, n_periods))
+    elif spacing == "monthly":
+        n_periods = min(n_rows, MAX_PERIODS[spacing])
+        months = pd.period_range("1970-01", periods=n_periods, freq="M")
+        periods = months.asfreq("D", how="start").asi8
+    else:
+        n_periods = min(n_rows, MAX_PERIODS[spacing])
+        step = 7 if spacing == "weekly" else 1
+        periods = np.arange(n_periods, dtype=np.int64) * step + 4  # Mondays
+    return periods[np.arange(n_rows) * n_periods // n_rows]
+
+
+def build_x(n_rows, x_type, spacing, rng):
+    if x_type == "number":
+        if spacing == "regular":
+            return pd.Series(np.arange(n_rows, dtype=np.float64))
+        else:
+            return pd.Series(np.cumsum(rng.exponential(size=n_rows)))
+    elif x_type == "text":
+        return pd.Series([f"label {i}" for i in range(n_rows)], dtype=object)
+    elif x_type == "date":
+        days = build_x_days(n_rows, spacing, rng)
+        return pd.Series(pd.arrays.PeriodArray(days, freq="D"))
+    else:  # timestamp
+        ns = build_x_days(n_rows, spacing, rng) * 86_400_000_000_000
+        if spacing == "irregular":
+            ns += rng.integers(0, 86_400, n_rows) * 1_000_000_000  # not midnight
+        return pd.Series(ns.view("datetime64[ns]"))
+
+
+def import_linechart(linechart_dir):
+    """Import linechart.py from `linechart_dir`."""
+    sys.path.insert(0, str(linechart_dir))
+    return importlib.import_module("linechart")
+
+
+def accepts_keyword(fn, name):
+    """Return True if `fn` takes a `name` argument."""
+    try:
+        return name in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def build_table(linechart, n_rows, n_series, x_type, spacing, null_density, seed=0):
+    """Build (table, input_columns, form) for one benchmark case."""
+    rng = np.random.default_rng(seed)
+    x = build_x(n_rows, x_type, spacing, rng)
+    if null_density:
+        x[rng.random(n_rows) < null_density] = None
+    data = {"X": x}
+    for i in range(n_series):
+        y = rng.standard_normal(n_rows)
+        if null_density:
+            y[rng.random(n_rows) < null_density] = np.nan
+        data[f"Y{i}"] = y
+    table = pd.DataFrame(data)
+
+    x_format = {
+        "number": "{:,}",
+        "date": {"weekly": "week", "monthly": "month"}.get(spacing, "day"),
+    }.get(x_type)
+    input_columns = {"X": Column("X", x_type, x_format)}
+    for i in range(n_series):
+        input_columns[f"Y{i}"] = Column(f"Y{i}", "number", "{:,.2f}")
+    form = linechart.Form.from_params(
+        title="Benchmark",
+        x_axis_label="",
+        y_axis_label="",
+        x_column="X",
+        y_columns=[{"column": f"Y{i}", "color": "#000000"} for i in range(n_series)],
+    )
+    return table, input_columns, form
+
+
+def time_stage(fn, repeat):
+    """Return ([seconds, ...], last result)."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def bench_case(linechart, case, repeat):
+    table, input_columns, form = build_table(linechart, **case)
+    records = []
+
+    def record(stage, times, **extra):
+        records.append(
+            {
+                **case,
+                "stage": stage,
+                "best_s": min(times),
+                "median_s": statistics.median(times),
+                "repeat": len(times),
+                **extra,
+            }
+        )
+
+    def record_absent(stage):
+        records.append({**case, "stage": stage, "absent": True})
+
+    if hasattr(form, "_make_x_series_and_mask"):
+        times, (x_series, _) = time_stage(
+            lambda: form._make_x_series_and_mask(table, input_columns), repeat
+        )
+        record("make_x_series_and_mask", times, output_rows=len(x_series.series))
+    else:
+        record_absent("make_x_series_and_mask")
+
+    times, chart = time_stage(lambda: form.make_chart(table, input_columns), repeat)
+    record("make_chart", times, output_rows=len(chart.x_series.series))
+
+    if case["x_type"] == "timestamp":
+        if hasattr(type(chart.x_series), "timestamp_tick_values_and_format"):
+            times, _ = time_stage(
+                lambda: chart.x_series.timestamp_tick_values_and_format, repeat
+            )
+            record("timestamp_tick_values_and_format", times)
+        else:
+            record_absent("timestamp_tick_values_and_format")
+
+    if hasattr(chart, "to_vega_inline_data"):
+        times, records_data = time_stage(chart.to_vega_inline_data, repeat)
+        record("to_vega_inline_data", times, output_rows=len(records_data))
+    else:
+        records_data = None
+        record_absent("to_vega_inline_data")
+
+    if records_data is not None and accepts_keyword(chart.to_vega, "data"):
+        data = {"values": records_data}
+        times, spec = time_stage(lambda: chart.to_vega(data=data), repeat)
+        record("to_vega", times)
+    else:
+        # to_vega() builds its own data: its time is not comparable
+        spec = chart.to_vega()
+        record_absent("to_vega")
+
+    times, json_text = time_stage(lambda: json.dumps(spec), repeat)
+    record("json_dumps", times, output_bytes=len(json_text))
+
+    if hasattr(chart, "to_vega_json_chunks"):
+        times, json_bytes = time_stage(
+            lambda: b"".join(chart.to_vega_json_chunks()), repeat
+        )
+        record("to_vega_json_chunks", times, output_bytes=len(json_bytes))
+    else:
+        record_absent("to_vega_json_chunks")
+
+    return records
+
+
+def git_commit(linechart_dir):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=linechart_dir,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    linechart = import_linechart(args.linechart_dir)
+    results = []
+    for n_rows in args.sizes:
+        for n_series in args.series:
+            for x_type in args.x_types:
+                for spacing in SPACINGS[x_type]:
+                    if spacing != "n/a" and spacing not in args.spacings:
+                        continue
+                    for null_density in args.null_densities:
+                        case = dict(
+                            n_rows=(
+                                min(n_rows, linechart.MaxNAxisLabels)
+                                if x_type == "text"
+                                else n_rows
+                            ),
+                            n_series=n_series,
+                            x_type=x_type,
+                            spacing=spacing,
+                            null_density=null_density,
+                        )
+                        if case["n_rows"] * (n_series + 1) > args.max_cells:
+                            print("skip (too big):", case, file=sys.stderr)
+                            continue
+                        print("bench:", case, file=sys.stderr)
+                        results.extend(bench_case(linechart, case, args.repeat))
+
+    output = {
+        "meta": {
+            "commit": git_commit(args.linechart_dir),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=1))
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+
+def compare(args):
+    """Print new/old best-time ratios; exit 1 if any exceeds --threshold.
+
+    Stages absent from either file are skipped.
+    """
+    old, new = (json.loads(Path(p).read_text()) for p in (args.old, args.new))
+    old_times = {
+        (*(r[k] for k in CASE_KEYS), r["stage"]): r["best_s"]
+        for r in old["results"]
+        if not r.get("absent")
+    }
+    n_regressions = 0
+    for r in new["results"]:
+        key = (*(r[k] for k in CASE_KEYS), r["stage"])
+        if r.get("absent") or key not in old_times:
+            continue
+        ratio = r["best_s"] / max(old_times[key], 1e-9)
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  REGRESSION"
+            n_regressions += 1
+        print(
+            "{:>9} rows {:>3} Y {:>9} {:>9} nulls={:<4} {:<34} {:8.4f}s -> {:8.4f}s"
+            " ({:.2f}x){}".format(
+                *(r[k] for k in CASE_KEYS),
+                r["stage"],
+                old_times[key],
+                r["best_s"],
+                ratio,
+                flag,
+            )
+        )
+    sys.exit(1 if n_regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subparsers = parser.add_subparsers(dest="command")
+    compare_parser = subparsers.add_parser("compare", help="compare two results")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold", type=float, default=1.2, help="slowdown ratio to flag"
+    )
+    parser.add_argument("--sizes", type=_int_list, default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--series", type=_int_list, default=[1, 10, 100])
+    parser.add_argument(
+        "--x-types", type=_str_list, default=["number", "text", "date", "timestamp"]
+    )
+    parser.add_argument(
+        "--spacings",
+        type=_str_list,
+        default=["regular", "irregular", "daily", "weekly", "monthly"],
+    )
+    parser.add_argument("--null-densities", type=_float_list, default=[0.0, 0.1])
+    parser.add_argument("--max-cells", type=int, default=20_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument(
+        "--linechart-dir",
+        type=Path,
+        default=Path(__file__).parent.parent,
+        help="directory of the linechart.py to benchmark (default: this checkout)",
+    )
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,52 @@
 from __future__ import annotations
 
+import contextlib
+import contextvars
 import datetime
+import functools
+import hashlib
+import io
 import json
 import math
+import os
+import sys
+import time
+import tracemalloc
+import unicodedata
+from collections import OrderedDict
 from string import Formatter
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from cjwmodule import i18n
 from dateutil.relativedelta import relativedelta
 from pandas.api.types import is_numeric_dtype
 
 MaxNAxisLabels = 300
 MaxSpecialCaseNTicks = 8
+ExpectedPlotWidth = 800
+"""Plot width (in pixels) we assume when choosing marks. Clients may differ."""
+MinPointMarkSpacing = 4
+"""Closest (in pixels) we draw a circle per datum; any closer, they overlap."""
+MaxPointMarks = 5_000
+"""Most circles (rows times series) we draw per datum before they bog down."""
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+ARROW_DATA_URL = "linechart-data.arrow"
+"""Placeholder URL in specs whose data is in an Arrow sidecar file."""
 
 
 def _migrate_params_vneg1_to_v0(params):
@@ -40,11 +73,33 @@ def _migrate_params_v0_to_v1(params):
     return {**params, "y_columns": y_columns}
 
 
+def _migrate_params_v1_to_v2(params):
+    """
+    v1: no 'max_points'.
+
+    v2: params['max_points'] is an int. 0 means, "chart all points".
+    """
+    return {**params, "max_points": 0}
+
+
+def _migrate_params_v2_to_v3(params):
+    """
+    v2: no 'downsample'.
+
+    v3: params['downsample'] is "lttb" or "m4".
+    """
+    return {**params, "downsample": "lttb"}
+
+
 def migrate_params(params):
     if "x_data_type" in params:
         params = _migrate_params_vneg1_to_v0(params)
     if isinstance(params["y_columns"], str):
         params = _migrate_params_v0_to_v1(params)
+    if "max_points" not in params:
+        params = _migrate_params_v1_to_v2(params)
+    if "downsample" not in params:
+        params = _migrate_params_v2_to_v3(params)
 
     return params
 
@@ -65,7 +120,67 @@ _DATE_TICK_FORMATS = {
     "day": "%b %-d, %Y",  # "Jan 3, 2020"
 }
 
+_AXIS_LABEL_FONT_SIZE = 12
+_AXIS_LABEL_MARGIN = 3
+"""Pixels between X-axis labels, below which the client slants them."""
+_CHAR_EMS = {
+    **{c: 0.56 for c in "0123456789"},
+    **{c: 0.25 for c in " .,:;'!|ijlf"},
+    **{c: 0.85 for c in "mwMW"},
+}
+"""Approximate Roboto character widths, in ems. See `_estimate_text_width()`."""
+
+
+def _char_ems(c: str) -> float:
+    """Guess the width of character `c`, in ems."""
+    try:
+        return _CHAR_EMS[c]
+    except KeyError:
+        if unicodedata.east_asian_width(c) in "WF":
+            return 1.0  # CJK ideographs, kana, fullwidth forms: square
+        return 0.65 if c.isupper() else 0.55
+
 
+def _estimate_text_width(text: str, font_size: int) -> float:
+    """Guess the pixel width of `text`, without a browser to measure it.
+
+    Wide and fullwidth East Asian characters are 1em, uppercase letters
+    0.65em and other unlisted characters 0.55em. The client never measures
+    labels: it compares our estimate with the plot width it renders, so an
+    estimate that is too small lets labels overlap.
+    """
+    return sum(_char_ems(c) for c in text) * font_size
+
+
+def _x_label_metrics(labels: List[Any], n_steps: int) -> Dict[str, Any]:
+    """Estimate the plot width evenly-spaced, centered `labels` need.
+
+    Neighbors overlap if the step between them is less than half of each of
+    their widths, plus margin. There are `n_steps` steps across the plot.
+    """
+    widths = [
+        _estimate_text_width(str(label), _AXIS_LABEL_FONT_SIZE) for label in labels
+    ]
+    step = max(
+        (
+            (left + right) / 2 + _AXIS_LABEL_MARGIN
+            for left, right in zip(widths, widths[1:])
+        ),
+        default=0,
+    )
+    return {"minPlotWidth": math.ceil(step * n_steps)}
+
+
+def _format_d3_date(date: datetime.date, d3_format: str) -> str:
+    """Format `date` like D3 would, for the formats in _DATE_TICK_FORMATS."""
+    return date.strftime(
+        d3_format.replace("%q", str((date.month - 1) // 3 + 1)).replace(
+            "%-d", str(date.day)
+        )
+    )
+
+
+@functools.lru_cache(maxsize=256)
 def python_format_to_d3_tick_format(python_format: str) -> str:
     """
     Build a d3-scale tickFormat specification based on Python str.
@@ -113,10 +228,380 @@ def _nice_date_ticks(
     return [(tick0 + tick_timedelta * i) for i in range(n_ticks)]
 
 
+def _series_to_json_list(series: pd.Series) -> List[Any]:
+    """Convert a Series to a list of JSON-compatible Python values.
+
+    Nulls become None. Everything else becomes a native Python value (int,
+    float, str, bool), exactly as `DataFrame.to_dict()` would produce.
+
+    This works on the whole column at once: one null mask, one conversion.
+    """
+    values = series.to_numpy()
+    nulls = pd.isna(values)
+    if nulls.any():
+        values = values.astype(object)  # numpy converts to native Python
+        values[nulls] = None
+    return values.tolist()
+
+
+def _encode_iso8601_timestamps(values: np.ndarray) -> np.ndarray:
+    """Format datetime64[ns] values like `pd.Timestamp.isoformat() + "Z"`.
+
+    That means "YYYY-MM-DDTHH:MM:SS", plus ".ffffff" if there are
+    microseconds or ".fffffffff" if there are nanoseconds.
+
+    This formats the whole buffer at once: no Python Timestamp objects.
+    """
+    values = values.astype("datetime64[ns]", copy=False)
+    ns = values.view(np.int64)
+    # timezone="UTC" appends "Z", and makes room for nanoseconds
+    ret = np.datetime_as_string(values, unit="s", timezone="UTC")
+    fractional = (ns % 1_000_000_000) != 0
+    if fractional.any():
+        nanos = (ns % 1000) != 0
+        micros = fractional & ~nanos
+        ret[micros] = np.datetime_as_string(values[micros], "us", timezone="UTC")
+        ret[nanos] = np.datetime_as_string(values[nanos], "ns", timezone="UTC")
+    return ret
+
+
+def _encode_iso8601_dates(ordinals: np.ndarray) -> np.ndarray:
+    """Format period[D] ordinals (days since the epoch) as "YYYY-MM-DD"."""
+    return np.datetime_as_string(ordinals.astype("datetime64[D]"), unit="D")
+
+
+_stage_observers: contextvars.ContextVar = contextvars.ContextVar(
+    "linechart_stage_observers", default=()
+)
+"""Objects with `stage_started(name)` and `stage_finished(name, info)` methods.
+
+This is a ContextVar, so observers only see stages in their own thread (or
+asyncio task). Register them with `_observing()`.
+"""
+
+
+@contextlib.contextmanager
+def _observing(observer: Any) -> Iterator[None]:
+    """Notify `observer` of the stages that run in this context."""
+    token = _stage_observers.set((*_stage_observers.get(), observer))
+    try:
+        yield
+    finally:
+        _stage_observers.reset(token)
+
+
+def _is_observed() -> bool:
+    """True if a stage's facts will be reported; skip costly facts otherwise."""
+    return bool(_stage_observers.get())
+
+
+@contextlib.contextmanager
+def _stage(name: str) -> Iterator[Dict[str, Any]]:
+    """Mark a stage of the render pipeline, for `_stage_observers`.
+
+    Yield a dict the stage may fill with facts about itself.
+    """
+    info: Dict[str, Any] = {}
+    observers = _stage_observers.get()
+    if not observers:
+        yield info
+        return
+
+    for observer in observers:
+        observer.stage_started(name)
+    try:
+        yield info
+    finally:
+        for observer in reversed(observers):
+            observer.stage_finished(name, info)
+
+
+class StageMetrics(NamedTuple):
+    """What a render stage cost; passed to `render(..., on_stage=...)`."""
+
+    stage: str
+    """"render", "make_chart", "make_x_series_and_mask", "to_vega", etc."""
+    seconds: float
+    """Wall time, including nested stages."""
+    info: Dict[str, Any]
+    """Facts the stage reported. Some of: "rows_in" and "rows_out" (rows
+    before and after masking or downsampling), "n_series", "n_rows" (output
+    data rows), "n_points" (non-null Y values charted) and "nbytes" (serialized
+    size)."""
+
+
+class _StageTimer:
+    """Stage observer that reports StageMetrics to a callback."""
+
+    def __init__(self, on_stage: Callable[[StageMetrics], None]):
+        self.on_stage = on_stage
+        self._starts: List[float] = []
+
+    def stage_started(self, name: str) -> None:
+        self._starts.append(time.perf_counter())
+
+    def stage_finished(self, name: str, info: Dict[str, Any]) -> None:
+        seconds = time.perf_counter() - self._starts.pop()
+        self.on_stage(StageMetrics(name, seconds, dict(info)))
+
+
+def _observe_chunks(chunks: Iterator[bytes], observer: Any) -> Iterator[bytes]:
+    """Report `chunks` to `observer` as a stage, while the host consumes them."""
+    observer.stage_started("to_vega_json_chunks")
+    nbytes = 0
+    try:
+        for chunk in chunks:
+            nbytes += len(chunk)
+            yield chunk
+    finally:
+        observer.stage_finished("to_vega_json_chunks", {"nbytes": nbytes})
+
+
+def _join_chunks(chunks: Iterator[bytes]) -> bytes:
+    """Concatenate chunks, holding about one copy of the output at a time.
+
+    (`b"".join()` would hold all chunks *and* their concatenation.)
+    """
+    buf = io.BytesIO()
+    for chunk in chunks:
+        buf.write(chunk)
+    return buf.getvalue()  # CPython shares, rather than copies, the buffer
+
+
+_NS_PER_DAY = 86_400 * 1_000_000_000
+_CHUNK_SIZE = 65_536
+"""Number of values per chunk when we scan a column and may exit early."""
+
+_CALENDAR_PERIODS = {
+    "year": relativedelta(years=1),  # Python doesn't do year math
+    "quarter": relativedelta(months=3),  # Python doesn't do month math
+    "month": relativedelta(months=1),
+    "week": datetime.timedelta(weeks=1),
+    "day": datetime.timedelta(days=1),
+}
+
+
+class _Calendar(NamedTuple):
+    unit: str
+    """"year", "quarter", "month", "week" or "day"."""
+    min: datetime.date
+    max: datetime.date
+
+
+def _classify_calendar(
+    ns: np.ndarray, extremes: Optional[Tuple[int, int]] = None
+) -> Optional[_Calendar]:
+    """Find the coarsest calendar unit all int64 nanosecond timestamps fit.
+
+    None if any timestamp isn't midnight UTC.
+
+    This is one sweep over the buffer, in chunks: each chunk is checked for
+    midnight, year start, quarter start, month start and weekday, and we
+    track min and max as we go (unless `extremes` gives us min and max
+    already). We stop at the first non-midnight chunk, and we stop checking
+    a unit once one chunk rules it out.
+    """
+    is_year_start = is_quarter_start = is_month_start = is_same_weekday = True
+    weekday = None
+    if extremes is None:
+        min_day = np.iinfo(np.int64).max
+        max_day = np.iinfo(np.int64).min
+    else:
+        min_day, max_day = (v // _NS_PER_DAY for v in extremes)
+    for start in range(0, len(ns), _CHUNK_SIZE):
+        days, remainder = np.divmod(ns[start : start + _CHUNK_SIZE], _NS_PER_DAY)
+        if remainder.any():
+            return None
+        if extremes is None:
+            min_day = min(min_day, days.min())
+            max_day = max(max_day, days.max())
+
+        if is_same_weekday:
+            weekdays = (days + 3) % 7  # 1970-01-01 was a Thursday (3)
+            if weekday is None:
+                weekday = weekdays[0]
+            is_same_weekday = bool((weekdays == weekday).all())
+
+        if is_month_start:
+            months = days.astype("datetime64[D]").astype("datetime64[M]")
+            month_starts = months.astype("datetime64[D]").view(np.int64)
+            is_month_start = bool((month_starts == days).all())
+            months_since_epoch = months.view(np.int64)  # January 1970 is 0
+            is_quarter_start = (
+                is_month_start
+                and is_quarter_start
+                and bool((months_since_epoch % 3 == 0).all())
+            )
+            is_year_start = (
+                is_quarter_start
+                and is_year_start
+                and bool((months_since_epoch % 12 == 0).all())
+            )
+
+    if is_year_start:
+        unit = "year"
+    elif is_quarter_start:
+        unit = "quarter"
+    elif is_month_start:
+        unit = "month"
+    elif is_same_weekday:
+        unit = "week"
+    else:
+        unit = "day"
+    return _Calendar(
+        unit,
+        datetime.date.fromordinal(_EPOCH_ORDINAL + int(min_day)),
+        datetime.date.fromordinal(_EPOCH_ORDINAL + int(max_day)),
+    )
+
+
+def _count_calendar_periods(
+    min_date: datetime.date, max_date: datetime.date, unit: str
+) -> int:
+    """Count `unit` boundaries between `min_date` and `max_date`."""
+    if unit == "year":
+        return max_date.year - min_date.year
+    elif unit == "quarter":
+        return (max_date.year * 4 + (max_date.month - 1) // 3) - (
+            min_date.year * 4 + (min_date.month - 1) // 3
+        )
+    elif unit == "month":
+        return (max_date.year * 12 + max_date.month) - (
+            min_date.year * 12 + min_date.month
+        )
+    elif unit == "week":
+        return (max_date - min_date).days // 7
+    else:  # day
+        return (max_date - min_date).days
+
+
+def _numeric_positions(series: pd.Series, column_type: str) -> Optional[np.ndarray]:
+    """View a non-null Series as an array of numbers, in its natural units.
+
+    Numbers are themselves; timestamps are int64 nanoseconds since the epoch;
+    dates are int64 days since the epoch. None for text.
+    """
+    if column_type == "number":
+        return series.to_numpy()
+    elif column_type == "timestamp":
+        return series.to_numpy().view(np.int64)
+    elif column_type == "date":
+        return series.array.asi8
+    else:  # text
+        return None
+
+
+def _any_chunk(n: int, predicate: Callable[[int, int], bool]) -> bool:
+    """Return True as soon as `predicate(start, stop)` is True for a chunk."""
+    return any(
+        predicate(start, min(start + _CHUNK_SIZE, n))
+        for start in range(0, n, _CHUNK_SIZE)
+    )
+
+
+class ColumnProfile(NamedTuple):
+    """Statistics about a column, computed once per render.
+
+    Validation, tick generation and downsampling all read this, instead of
+    each making their own passes over the column.
+    """
+
+    null_count: int
+    non_null_count: int
+    min: Any
+    """Minimum non-null value, in `_numeric_positions()` units. None for text."""
+    max: Any
+    """Maximum non-null value, in `_numeric_positions()` units. None for text."""
+    has_two_distinct: bool
+    is_monotonic_increasing: bool
+    """True if non-null values never decrease. Always False for text."""
+
+    @classmethod
+    def from_values(
+        cls, values: pd.Series, column_type: str, null_count: int
+    ) -> ColumnProfile:
+        """Profile `values`, the non-null values of a column."""
+        n = len(values)
+        positions = _numeric_positions(values, column_type)
+        if positions is None:  # text
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = values.cat.codes.to_numpy()
+            else:
+                codes = values.to_numpy()
+            has_two_distinct = n > 0 and _any_chunk(
+                n, lambda start, stop: bool((codes[start:stop] != codes[0]).any())
+            )
+            return cls(null_count, n, None, None, has_two_distinct, False)
+
+        if n == 0:
+            return cls(null_count, 0, None, None, False, False)
+
+        min_value = positions.min()
+        max_value = positions.max()
+
+        # Chunks overlap by one value, so we compare across chunk boundaries
+        def has_decrease(start: int, stop: int) -> bool:
+            chunk = positions[start : stop + 1]
+            return bool((chunk[1:] < chunk[:-1]).any())
+
+        is_monotonic_increasing = not _any_chunk(n, has_decrease)
+        return cls(
+            null_count,
+            n,
+            min_value,
+            max_value,
+            bool(min_value != max_value),
+            is_monotonic_increasing,
+        )
+
+
+_JSON_ROWS_PER_CHUNK = 2_000
+
+
+def _json_value_strings(values: np.ndarray, escape_str: bool) -> List[str]:
+    """Format each value of an array as JSON, like `json.dumps()` would.
+
+    Numbers are formatted by NumPy in bulk (its float64 formatting matches
+    Python's repr()). Nulls become "null". str values are escaped only if
+    `escape_str`; otherwise we trust they need no escaping.
+
+    The output matches `json.dumps(_series_to_json_list(...))`: float32 values
+    print as the float64 values `tolist()` gives; nullable extension arrays
+    (object arrays of Python scalars and pd.NA) print as their scalars.
+    """
+    if values.dtype.kind == "f":
+        values = values.astype(np.float64, copy=False)
+        ret = values.astype(str).tolist()
+        for i in np.flatnonzero(~np.isfinite(values)):
+            value = values[i]
+            ret[i] = "null" if np.isnan(value) else json.dumps(float(value))
+        return ret
+    elif values.dtype.kind in "iu":
+        return values.astype(str).tolist()
+    elif values.dtype.kind == "b":
+        return np.where(values, "true", "false").tolist()
+    else:  # object: str, Python scalars and nulls
+        nulls = pd.isna(values)
+        return [
+            (
+                "null"
+                if null
+                else (
+                    '"' + v + '"'
+                    if not escape_str and isinstance(v, str)
+                    else json.dumps(v)
+                )
+            )
+            for v, null in zip(values.tolist(), nulls.tolist())
+        ]
+
+
 class XSeries(NamedTuple):
     series: pd.Series
     column: Any
     """RenderColumn (has a '.name', '.type' and '.format')."""
+    profile: Optional[ColumnProfile] = None
+    """Statistics about `series`, if we computed them already."""
 
     @property
     def name(self):
@@ -142,15 +627,48 @@ class XSeries(NamedTuple):
     def json_compatible_values(self) -> pd.Series:
         """Array of str or int or float values for the X axis of the chart.
 
-        In particular: date+timestamp values will be converted to str.
+        In particular: date+timestamp values will be converted to str. That
+        conversion reads the whole column: call this once per render.
         """
         if self.column.type == "timestamp":
-            return self.series.map(pd.Timestamp.isoformat) + "Z"
+            return pd.Series(
+                _encode_iso8601_timestamps(self.series.to_numpy()),
+                index=self.series.index,
+                dtype=object,
+            )
         elif self.column.type == "date":
-            return self.series.dt.strftime("%Y-%m-%d")
+            return pd.Series(
+                _encode_iso8601_dates(self.series.array.asi8),
+                index=self.series.index,
+                dtype=object,
+            )
         else:
             return self.series
 
+    @property
+    def epoch_ms_values(self) -> pd.Series:
+        """Array of int milliseconds since the epoch, for a temporal X axis.
+
+        Vega parses these faster than ISO8601 strings, and they are smaller.
+        """
+        if self.column.type == "timestamp":
+            ms = self.series.to_numpy().view(np.int64) // 1_000_000
+        else:  # date
+            ms = self.series.array.asi8 * 86_400_000
+        return pd.Series(ms, index=self.series.index)
+
+    @property
+    def numeric_values(self) -> Optional[np.ndarray]:
+        """Array of float64 positions along the X axis, for downsampling.
+
+        Timestamps become nanoseconds since the epoch; dates become days since
+        the epoch. None if this is a text series.
+        """
+        positions = _numeric_positions(self.series, self.column.type)
+        if positions is None:
+            return None
+        return positions.astype(np.float64, copy=False)
+
     @property
     def timestamp_tick_values_and_format(
         self,
@@ -161,61 +679,44 @@ class XSeries(NamedTuple):
 
         None if we do not special-case this arrangement of timestamps.
 
-        Special cases:
-
-            * All values are midnight UTC on the same weekday: this is
-              a "week" series. Impute missing timestamps and return the regular
-              monotonic series -- a series of dates of interest. If there are
-              >MaxSpecialCaseNTicks, pick the lowest interval that produces
-              fewer ticks. Make sure the _last_ date is always a tick, and
-              impute a start tick that may come before all dates in the series.
+        Special cases (all values must be midnight UTC):
+
+            * All values are the first of the year: "year" series.
+            * All values are the first of a quarter: "quarter" series.
+            * All values are the first of the month: "month" series.
+            * All values are on the same weekday: "week" series.
+            * Otherwise, if there are <MaxSpecialCaseNTicks days in the
+              domain: "day" series. (Over longer ranges, D3 picks nicer
+              ticks than every Nth day.)
+
+        For each special case, impute missing timestamps and return the regular
+        monotonic series -- a series of dates of interest. If there are
+        >MaxSpecialCaseNTicks, pick the lowest interval that produces fewer
+        ticks. Make sure the _last_ date is always a tick, and impute a start
+        tick that may come before all dates in the series.
         """
         assert self.column.type == "timestamp"
 
-        if not self.series.dt.normalize().equals(self.series):
+        if self.profile is None:
+            extremes = None
+        else:
+            extremes = (self.profile.min, self.profile.max)
+        calendar = _classify_calendar(self.series.to_numpy().view(np.int64), extremes)
+        if calendar is None:
             # Dates with times. Fallback to vega-lite (D3) defaults
             return None
 
-        # Okay, we have whole dates.
-
-        def ordinal(v: pd.Timestamp, freq: str) -> int:
-            return v.to_period(freq).ordinal
-
-        def date(v: pd.Timestamp) -> datetime.date:
-            return datetime.date(v.year, v.month, v.day)
-
-        if self.series.dt.is_year_start.all():
-            # All dates are the first of the year. Treat this as "years".
-            series_min = self.series.min()
-            series_max = self.series.max()
-            period = relativedelta(years=1)  # Python doesn't do year math
-            n_periods_in_domain = ordinal(series_max, "Y") - ordinal(series_min, "Y")
-            return (
-                _nice_date_ticks(date(series_max), n_periods_in_domain, period),
-                _DATE_TICK_FORMATS["year"],
-            )
-
-        if self.series.dt.is_month_start.all():
-            # All dates are the first of the month. Treat this as "months".
-            series_min = self.series.min()
-            series_max = self.series.max()
-            period = relativedelta(months=1)  # Python doesn't do month math
-            n_periods_in_domain = ordinal(series_max, "M") - ordinal(series_min, "M")
-            return (
-                _nice_date_ticks(date(series_max), n_periods_in_domain, period),
-                _DATE_TICK_FORMATS["month"],
-            )
-
-        if self.series.dt.dayofweek.nunique() == 1:
-            # All dates fall on the same weekday. Treat this as "weeks".
-            series_min = self.series.min()
-            series_max = self.series.max()
-            period = datetime.timedelta(weeks=1)
-            n_periods_in_domain = ordinal(series_max, "W") - ordinal(series_min, "W")
-            return (
-                _nice_date_ticks(date(series_max), n_periods_in_domain, period),
-                _DATE_TICK_FORMATS["week"],
-            )
+        period = _CALENDAR_PERIODS[calendar.unit]
+        n_periods_in_domain = _count_calendar_periods(
+            calendar.min, calendar.max, calendar.unit
+        )
+        if calendar.unit == "day" and n_periods_in_domain >= MaxSpecialCaseNTicks:
+            # Daily data over weeks or years. Fallback to vega-lite (D3) defaults
+            return None
+        return (
+            _nice_date_ticks(calendar.max, n_periods_in_domain, period),
+            _DATE_TICK_FORMATS[calendar.unit],
+        )
 
 
 class YSeries(NamedTuple):
@@ -233,6 +734,470 @@ class YSeries(NamedTuple):
         return python_format_to_d3_tick_format(self.tick_format)
 
 
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Pick `n_out` indices of (x, y) with Largest-Triangle-Three-Buckets.
+
+    `x` must be sorted and neither `x` nor `y` may contain NaN. The first and
+    last indices are always picked.
+
+    Each pick depends on the previous one, so we loop over buckets (there are
+    `n_out` of them); all work _within_ a bucket is vectorized.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    # n_out - 2 buckets for the points between the first and the last.
+    # Buckets are never empty, because n_out - 2 < n - 2.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    bucket_sizes = np.diff(edges)
+    # Each bucket's triangle's third vertex is the _next_ bucket's average.
+    # The last bucket's "next bucket" is the last point.
+    next_x = np.append(np.add.reduceat(x[: n - 1], edges[:-1]) / bucket_sizes, x[-1])
+    next_y = np.append(np.add.reduceat(y[: n - 1], edges[:-1]) / bucket_sizes, y[-1])
+
+    picks = np.empty(n_out, dtype=np.intp)
+    picks[0] = 0
+    picks[-1] = n - 1
+    a = 0  # previous pick
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[a], y[a]
+        cx, cy = next_x[bucket + 1], next_y[bucket + 1]
+        areas = np.abs(
+            (ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay)
+        )
+        a = start + int(np.argmax(areas))
+        picks[bucket + 1] = a
+    return picks
+
+
+def _m4_n_bins(max_points: int) -> int:
+    """Count the X bins M4 uses to pick about `max_points` points per series."""
+    return max(max_points // 4, 1)
+
+
+def _m4_bins(x: np.ndarray, x_min: float, x_max: float, n_bins: int) -> np.ndarray:
+    """Number each of `x`'s bins: `n_bins` equal slices of [`x_min`, `x_max`].
+
+    `_m4_indices()` and `_m4_bin_candidates()` both bin with this, so given
+    the same float64 values and domain, they put each row in the same bin.
+    """
+    x_span = x_max - x_min
+    if x_span > 0:
+        bins = ((x - x_min) * (n_bins / x_span)).astype(np.intp)
+        np.clip(bins, 0, n_bins - 1, out=bins)  # max X goes in the last bin
+    else:
+        bins = np.zeros(len(x), dtype=np.intp)
+    return bins
+
+
+def _m4_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_bins: int,
+    x_min: Optional[float] = None,
+    x_max: Optional[float] = None,
+) -> np.ndarray:
+    """Pick first, last, min-Y and max-Y indices of (x, y) in each X bin.
+
+    `x` must be sorted float64 and neither `x` nor `y` may contain NaN. Bins
+    are `n_bins` equal-width slices of [`x_min`, `x_max`] (think: pixel
+    columns), which default to `x`'s own range. We pick at most `4 * n_bins`
+    indices. Unlike LTTB, M4 never drops a spike.
+
+    Ties go to the lowest index (min) and the highest index (max), as they
+    do in `_m4_bin_candidates()`.
+
+    All bins are reduced at once: no Python loops.
+    """
+    n = len(x)
+    if not n:
+        return np.arange(0)
+    bins = _m4_bins(
+        x,
+        x[0] if x_min is None else x_min,
+        x[-1] if x_max is None else x_max,
+        n_bins,
+    )
+
+    # x is sorted, so each bin is a contiguous run
+    firsts = np.flatnonzero(np.diff(bins, prepend=-1))
+    lasts = np.append(firsts[1:] - 1, n - 1)
+    # Sort by (bin, y): each run's first index is its min-Y, last is its max-Y
+    by_y = np.lexsort((y, bins))
+    return np.unique(np.concatenate([firsts, lasts, by_y[firsts], by_y[lasts]]))
+
+
+def _m4_bin_candidates(
+    x: np.ndarray, ys: List[np.ndarray], x_min: Any, x_max: Any, n_bins: int
+) -> np.ndarray:
+    """Pick rows that are the min-X, max-X, min-Y or max-Y of a Y in an X bin.
+
+    Bins are `_m4_bins()` of the whole chart's X domain [`x_min`, `x_max`],
+    and `x` need not be sorted. That makes this a mergeable pre-reduction:
+    candidates of (candidates of A + candidates of B) are the candidates of
+    A + B, and `_m4_indices()` over the same domain and `n_bins` picks the
+    same rows from the candidates as from all rows. NaN Y values are ignored;
+    `x` may not contain NaN. We also pick the rows with min and max X.
+
+    Rows tie by X order, then by row order, as they do once `_downsample()`
+    stably sorts them by X.
+    """
+    if not len(x):
+        return np.arange(0)
+
+    x = x.astype(np.float64, copy=False)
+    bins = _m4_bins(x, float(x_min), float(x_max), n_bins)
+
+    # The first min-X row and the last max-X row, like `_downsample()`
+    picks = [np.array([np.argmin(x), len(x) - 1 - np.argmax(x[::-1])])]
+    for y in ys:
+        valid = np.flatnonzero(~np.isnan(y))
+        if not len(valid):
+            continue
+        valid_bins = bins[valid]
+        valid_x = x[valid]
+        for key in (valid_x, y[valid]):
+            # Sort by (bin, key, x): each bin's first index has min key, last max
+            order = np.lexsort((valid_x, key, valid_bins))
+            firsts = np.flatnonzero(np.diff(valid_bins[order], prepend=-1))
+            lasts = np.append(firsts[1:] - 1, len(order) - 1)
+            picks.append(valid[order[firsts]])
+            picks.append(valid[order[lasts]])
+    return np.unique(np.concatenate(picks))
+
+
+_DOWNSAMPLERS = {
+    # (x, y, max_points, (x_min, x_max)) => indices
+    "lttb": lambda x, y, max_points, x_domain: _lttb_indices(x, y, max_points),
+    "m4": lambda x, y, max_points, x_domain: _m4_indices(
+        x, y, _m4_n_bins(max_points), *x_domain
+    ),
+}
+
+
+def _downsample(
+    x_series: XSeries, y_serieses: List[YSeries], max_points: int, method: str
+) -> Tuple[XSeries, List[YSeries]]:
+    """Drop rows that no Y series picks as one of its `max_points` points.
+
+    `method` is a key of `_DOWNSAMPLERS`: "lttb" or "m4".
+
+    Every Y series picks about `max_points` rows on its own (ignoring its
+    missing values), and we keep the union of all rows any series picked.
+    Series rarely pick the same rows, so with k Y series the chart may keep up
+    to about k * `max_points` rows -- and each series keeps its values at all
+    of them. We always keep the rows with min and max X, so the X domain (and
+    its ticks) do not change.
+
+    Text X values are never downsampled: there are few of them.
+    """
+    pick = _DOWNSAMPLERS[method]
+    x = x_series.numeric_values
+    if x is None or len(x) <= max_points:
+        return x_series, y_serieses
+
+    if x_series.profile is not None:
+        is_monotonic_increasing = x_series.profile.is_monotonic_increasing
+    else:
+        is_monotonic_increasing = bool(np.all(x[1:] >= x[:-1]))
+    if is_monotonic_increasing:
+        order = np.arange(len(x))
+    else:
+        order = np.argsort(x, kind="stable")
+    x = x[order]
+
+    keep = np.zeros(len(x), dtype=bool)
+    keep[order[0]] = True
+    keep[order[-1]] = True
+    for y_series in y_serieses:
+        y = y_series.series.to_numpy(dtype=np.float64)[order]
+        valid = np.flatnonzero(~np.isnan(y))
+        # M4 bins every series on the chart's X domain, not just its own
+        picks = pick(x[valid], y[valid], max_points, (x[0], x[-1]))
+        keep[order[valid[picks]]] = True
+    keep = np.flatnonzero(keep)
+
+    if x_series.profile is not None:
+        # min and max are kept, and a subset of sorted values is sorted
+        profile = x_series.profile._replace(non_null_count=len(keep))
+    else:
+        profile = None
+    return (
+        x_series._replace(
+            series=x_series.series.take(keep).reset_index(drop=True), profile=profile
+        ),
+        [
+            y_series._replace(series=y_series.series.take(keep).reset_index(drop=True))
+            for y_series in y_serieses
+        ],
+    )
+
+
+class _VegaSpecShape(NamedTuple):
+    """All a spec's config and layer templates depend on."""
+
+    y_axis_tick_format: str
+    n_series: int
+    series_layout: str
+    is_dense: bool
+    theme: str
+
+
+class _VegaSpecSkeleton(NamedTuple):
+    config: Dict[str, Any]
+    layers: List[Dict[str, Any]]
+    """Layers, minus colors and legend: `Chart._build_vega_spec()` adds them."""
+
+
+_LABEL_COLOR = "#383838"
+_TITLE_COLOR = "#686768"
+_HOVER_COLOR = _TITLE_COLOR
+_GRID_COLOR = "#ededed"
+
+THEME_VERSION = 1
+"""Version of THEME. Bump it (and linechart.html's copy) on every change."""
+THEME = {
+    "font": "Roboto, Helvetica, sans-serif",
+    "title": {
+        "offset": 15,
+        "color": _LABEL_COLOR,
+        "fontSize": 20,
+        "fontWeight": "normal",
+    },
+    "axis": {
+        "tickSize": 3,
+        "tickColor": _GRID_COLOR,  # fade into grid
+        "titlePadding": 20,
+        "titleFontSize": 15,
+        "titleFontWeight": "normal",
+        "titleColor": _TITLE_COLOR,
+        "labelColor": _LABEL_COLOR,
+        "labelFontSize": _AXIS_LABEL_FONT_SIZE,
+        "labelPadding": 10,
+        "gridColor": _GRID_COLOR,
+        "domain": False,  # no bold lines along left + bottom
+    },
+    "axisY": {
+        "tickCount": {"expr": "ceil(height/100)"},  # fewer lines
+    },
+    "legend": {
+        "rowPadding": 10,
+        "labelFontSize": 12,
+        "labelColor": _LABEL_COLOR,
+    },
+}
+"""Vega-Lite config every chart shares. linechart.html ships a copy."""
+
+
+def _hover_only(layer: Dict[str, Any], is_dense: bool) -> Dict[str, Any]:
+    """Show `layer`'s marks only at the hovered X.
+
+    Dense charts filter out the other rows, so the client draws no hidden
+    marks. Otherwise, every mark is drawn transparent (and it appears
+    without a dataflow update).
+    """
+    if is_dense:
+        return {**layer, "transform": [{"filter": {"selection": "hover"}}]}
+    return {
+        **layer,
+        "encoding": {
+            **layer["encoding"],
+            "opacity": {
+                # Only the selected ("hover") point has opacity
+                "condition": {"selection": "hover", "value": 1},
+                "value": 0,
+            },
+        },
+    }
+
+
+def _copy_json(value: Any) -> Any:
+    """Copy the dicts and lists in `value`, so THEME never leaks into a spec."""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    else:
+        return value
+
+
+def _line_point(is_dense: bool) -> Union[bool, Dict[str, Any]]:
+    """Describe the dot on each line: none on dense charts."""
+    return False if is_dense else {"shape": "circle", "size": 36}
+
+
+def _vega_spec_skeleton(shape: _VegaSpecShape) -> _VegaSpecSkeleton:
+    """Build the parts of a spec that only depend on `shape`.
+
+    Every call builds new dicts, so callers may modify the spec they build
+    from it. (Building is cheaper than copying a cached skeleton.)
+    """
+    # What differs per chart
+    config = {"axisY": {"format": shape.y_axis_tick_format}}
+    if shape.y_axis_tick_format[-1] == "d":
+        config["axisY"]["tickMinStep"] = 1
+
+    if shape.theme == "inline":
+        config = {
+            "font": THEME["font"],
+            "title": _copy_json(THEME["title"]),
+            "axis": _copy_json(THEME["axis"]),
+            "axisY": {**config["axisY"], **_copy_json(THEME["axisY"])},
+            # A legend only appears with multiple series
+            **({"legend": _copy_json(THEME["legend"])} if shape.n_series > 1 else {}),
+        }
+
+    # Unless dense, there's always a visible dot on each line. The hover
+    # point layer draws _another_ dot on top. (Rationale: we can't control
+    # this point's color separately from its line's color.)
+    hover_selection = {
+        "type": "single",
+        "on": "mouseover",
+        "empty": "none",
+        # https://vega.github.io/vega-lite/docs/nearest.html
+        "nearest": True,
+        "clear": "mouseout",
+    }
+    if shape.is_dense:
+        # Voronoi on X alone, not on every datum
+        hover_selection["encodings"] = ["x"]
+    elif shape.series_layout == "fold":
+        # Each X has one row per series: select them all
+        hover_selection["fields"] = ["x"]
+    rule_layer = {
+        # https://vega.github.io/vega-lite/examples/interactive_multi_line_tooltip.html
+        #
+        # The "rule" layer (vertical line) is before all the "line"
+        # layers so the lines are drawn on top of the rule.
+        "mark": {
+            # rule
+            "type": "rule",
+            "strokeWidth": 2,
+            "color": _HOVER_COLOR,
+        },
+        "selection": {"hover": hover_selection},
+        "encoding": {
+            # Only the selected ("hover") rule has opacity
+            "opacity": {
+                "condition": {
+                    "selection": "hover",
+                    "value": 1,
+                },
+                "value": 0,
+            },
+        },
+    }
+
+    if shape.series_layout == "fold":
+        # After `Chart.to_vega_fold_transform()`, one line layer draws all
+        # series, colored by "series". The spec (and the Vega dataflow the
+        # client builds from it) does not gain layers as series are added.
+        layers = [
+            {
+                "mark": {"type": "line", "point": _line_point(shape.is_dense)},
+                "encoding": {
+                    "y": {"field": "y", "type": "quantitative"},
+                    "color": {"field": "series", "type": "nominal"},
+                },
+            },
+            rule_layer,
+            _hover_only(
+                {
+                    "mark": {
+                        "type": "point",
+                        "size": 49,
+                        "filled": True,
+                        "strokeWidth": 2,
+                        "stroke": _HOVER_COLOR,
+                    },
+                    "encoding": {
+                        "y": {"field": "y", "type": "quantitative"},
+                        "fill": {"field": "series", "type": "nominal"},
+                    },
+                },
+                shape.is_dense,
+            ),
+        ]
+    else:
+        layers = [
+            # Each column gets two layers:
+            #
+            # 1. a "line" layer, with the line, point and legend details
+            # 2. a "point" layer, only shown when hovering
+            #
+            # There's also a "hover" layer (a vertical "rule") in between.
+            #
+            # For three columns, the layers are (from bottom to top):
+            #
+            # * y0-line (with a point)
+            # * y1-line (with a point)
+            # * y2-line (with a point)
+            # * rule (on hover)
+            # * y0-point (on hover)
+            # * y1-point (on hover)
+            # * y2-point (on hover)
+            #
+            # All the "hover" stuff appears on _top_ of all the not-hover
+            # stuff. That breaks spatial rules a bit (y1-point can appear
+            # atop y0-line, on hover), for the sake of readability (the
+            # user _wants_ to see y1-point on hover).
+            *[
+                {
+                    # yN-line
+                    "mark": {"type": "line", "point": _line_point(shape.is_dense)},
+                    "encoding": {
+                        "y": {
+                            "field": f"y{i}",
+                            "type": "quantitative",
+                        },
+                        "color": {
+                            # This would normally be a constant, but one
+                            # vega-lite side-effect is to populate the
+                            # legend. (y0-line gets the scale and legend.)
+                            "datum": f"y{i}",
+                        },
+                    },
+                }
+                for i in range(shape.n_series)
+            ],
+            rule_layer,
+            *[
+                _hover_only(
+                    {
+                        # yN-point (its "fill" is its series' color)
+                        "mark": {
+                            "type": "point",
+                            "size": 49,
+                            "strokeWidth": 2,
+                            "stroke": _HOVER_COLOR,
+                        },
+                        "encoding": {
+                            "y": {
+                                # repeated
+                                "field": f"y{i}",
+                                "type": "quantitative",
+                            },
+                        },
+                    },
+                    shape.is_dense,
+                )
+                for i in range(shape.n_series)
+            ],
+        ]
+
+    return _VegaSpecSkeleton(config, layers)
+
+
+def _with_encoding(layer: Dict[str, Any], channel: str, **props) -> Dict[str, Any]:
+    """Copy `layer`, adding `props` to its `channel` encoding."""
+    encoding = layer["encoding"]
+    return {**layer, "encoding": {**encoding, channel: {**encoding[channel], **props}}}
+
+
 class Chart(NamedTuple):
     """Fully-sane parameters. Columns are series."""
 
@@ -243,6 +1208,26 @@ class Chart(NamedTuple):
     x_series: XSeries
     y_serieses: List[YSeries]  # "serieses": the new plural of "series"
     y_axis_tick_format: str
+    temporal_encoding: str = "iso8601"
+    """How to send date/timestamp X values: "iso8601" str or "epoch-ms" int."""
+    series_layout: str = "layers"
+    """How to draw Y series: "layers" (two layers per series) or "fold"."""
+    theme: str = "inline"
+    """Where THEME comes from: "inline" (the spec's config) or "client"."""
+
+    @property
+    def x_uses_epoch_ms(self) -> bool:
+        return (
+            self.temporal_encoding == "epoch-ms"
+            and self.x_series.vega_data_type == "temporal"
+        )
+
+    def _vega_date_value(self, date: datetime.date) -> Union[str, int]:
+        """Encode a tick date the same way we encode X values."""
+        if self.x_uses_epoch_ms:
+            return (date.toordinal() - _EPOCH_ORDINAL) * 86_400_000
+        else:
+            return date.isoformat()
 
     def to_vega_inline_data(self) -> Dict[str, Any]:
         """Build a dict for Vega's .datasets Array.
@@ -253,16 +1238,103 @@ class Chart(NamedTuple):
         colname='x'). Vega conflicts behave differently from Workbench
         column-name conflicts, and they add no value.)
         """
-        datasets = {"x": self.x_series.json_compatible_values}  # all str/number
-
-        for i, y_series in enumerate(self.y_serieses):
-            datasets[f"y{i}"] = y_series.series  # all number
-        return [
-            {k: None if pd.isnull(v) else v for k, v in record.items()}
-            for record in pd.DataFrame(datasets).to_dict(orient="records")
+        keys = ["x", *(f"y{i}" for i in range(len(self.y_serieses)))]
+        columns = [
+            _series_to_json_list(self.x_json_values),
+            *(_series_to_json_list(y.series) for y in self.y_serieses),  # number
         ]
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+    @property
+    def x_json_values(self) -> pd.Series:
+        """X values as they appear in Vega data: str, int or float."""
+        if self.x_uses_epoch_ms:
+            return self.x_series.epoch_ms_values  # int
+        else:
+            return self.x_series.json_compatible_values  # str/number
+
+    def to_vega_json_chunks(
+        self, rows_per_chunk: int = _JSON_ROWS_PER_CHUNK
+    ) -> Iterator[bytes]:
+        """Serialize `to_vega()` as UTF-8 JSON, streaming data from columns.
+
+        The output is byte-for-byte `json.dumps(self.to_vega())`, but we never
+        build the records list: each chunk of rows is formatted straight from
+        the column buffers. Peak memory is about one chunk of output.
+        """
+        spec = self._build_vega_spec({})  # skeleton: we'll stream "data" ourselves
+        head = []  # "key: value" strings
+        for key, value in spec.items():
+            if key == "data":
+                head.append(json.dumps(key) + ': {"values": [')
+                yield ("{" + ", ".join(head)).encode("utf-8")
+                yield from self._iter_json_data_values(rows_per_chunk)
+                head = ["]}"]
+            else:
+                head.append(json.dumps(key) + ": " + json.dumps(value))
+        yield (", ".join(head) + "}").encode("utf-8")
+
+    def _iter_json_data_values(self, rows_per_chunk: int) -> Iterator[bytes]:
+        """Yield `to_vega_inline_data()` as JSON, minus the enclosing "[]".
+
+        X values are encoded one chunk at a time, too: we never hold more
+        than a chunk of ISO8601 strings.
+        """
+        # Our ISO8601 strings are plain ASCII: no need to escape them
+        x_needs_escape = self.x_series.vega_data_type == "ordinal"
+        row_format = (
+            "{"
+            + ", ".join(
+                f'"{key}": %s'
+                for key in ["x", *(f"y{i}" for i in range(len(self.y_serieses)))]
+            )
+            + "}"
+        )
+        y_columns = [y.series.to_numpy() for y in self.y_serieses]
+        n = len(self.x_series.series)
+        for start in range(0, n, rows_per_chunk):
+            stop = min(start + rows_per_chunk, n)
+            column_jsons = [
+                _json_value_strings(self._x_json_slice(start, stop), x_needs_escape),
+                *(_json_value_strings(c[start:stop], False) for c in y_columns),
+            ]
+            rows = ", ".join(row_format % row for row in zip(*column_jsons))
+            yield ((", " if start else "") + rows).encode("utf-8")
+
+    def _x_json_slice(self, start: int, stop: int) -> np.ndarray:
+        """Compute `x_json_values[start:stop]`, encoding only those rows."""
+        x_series = self.x_series
+        if x_series.column.type == "timestamp":
+            ns = x_series.series.to_numpy()[start:stop]
+            if self.x_uses_epoch_ms:
+                return ns.view(np.int64) // 1_000_000
+            return _encode_iso8601_timestamps(ns)
+        elif x_series.column.type == "date":
+            days = x_series.series.array.asi8[start:stop]
+            if self.x_uses_epoch_ms:
+                return days * 86_400_000
+            return _encode_iso8601_dates(days)
+        else:
+            return x_series.series.to_numpy()[start:stop]
 
     def to_vega_x_encoding(self) -> Dict[str, Any]:
+        return self._to_vega_x_encoding_and_label_metrics()[0]
+
+    def to_vega_x_label_metrics(self) -> Optional[Dict[str, Any]]:
+        """Estimate the plot width X-axis labels need, to lie flat.
+
+        Return `{"minPlotWidth": pixels}` when we know every label the axis
+        will show: text X values, or our special-cased timestamp ticks. The
+        client slants labels when the plot is narrower, before its first
+        render. Return None when Vega picks ticks: it hides overlapping
+        labels itself ("labelOverlap": "parity").
+        """
+        return self._to_vega_x_encoding_and_label_metrics()[1]
+
+    def _to_vega_x_encoding_and_label_metrics(
+        self,
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        label_metrics = None
         ret = {
             "field": "x",
             "type": self.x_series.vega_data_type,
@@ -273,6 +1345,9 @@ class Chart(NamedTuple):
             ret["axis"]["labelAngle"] = 0
             ret["axis"]["labelOverlap"] = False
             ret["sort"] = None
+            labels = pd.unique(self.x_series.json_compatible_values)
+            # point scale: half a step of padding on each side
+            label_metrics = _x_label_metrics(labels, len(labels))
         else:
             ret["axis"]["tickCount"] = {"expr": "ceil(width/100)"}
             ret["axis"]["labelOverlap"] = "parity"  # no auto-rotating
@@ -289,16 +1364,25 @@ class Chart(NamedTuple):
                 special_case = self.x_series.timestamp_tick_values_and_format
                 if special_case:
                     ticks, tick_format = special_case
-                    ret["axis"]["values"] = [tick.isoformat() for tick in ticks]
+                    ret["axis"]["values"] = [
+                        self._vega_date_value(tick) for tick in ticks
+                    ]
                     ret["axis"][
                         "labelExpr"
                     ] = f'utcFormat(datum.value, "{tick_format}")'
-                    ret["scale"] = {
-                        "domainMin": {
+                    if self.x_uses_epoch_ms:
+                        domain_min = self._vega_date_value(ticks[0])
+                    else:
+                        domain_min = {
                             "expr": "utc(%d, %d, %d)"
                             % (ticks[0].year, ticks[0].month - 1, ticks[0].day)
                         }
-                    }
+                    ret["scale"] = {"domainMin": domain_min}
+                    # ticks at both ends of the domain
+                    label_metrics = _x_label_metrics(
+                        [_format_d3_date(tick, tick_format) for tick in ticks],
+                        max(len(ticks) - 1, 1),
+                    )
             else:
                 unit = self.x_series.column.format
                 time_unit = _DATE_TIME_UNITS[unit]
@@ -306,7 +1390,7 @@ class Chart(NamedTuple):
                 ret["timeUnit"] = time_unit
                 ret["axis"]["labelExpr"] = f'utcFormat(datum.value, "{tick_format}")'
 
-        return ret
+        return ret, label_metrics
 
     def to_vega_y_encoding(self) -> Dict[str, Any]:
         return {"title": self.y_axis_label}
@@ -330,10 +1414,102 @@ class Chart(NamedTuple):
             "range": [y.color for y in self.y_serieses],
         }
 
-    def to_vega(self) -> Dict[str, Any]:
-        """Build a Vega line chart."""
+    def to_vega_fold_transform(self) -> Dict[str, Any]:
+        """Fold columns "y0,y1,..." into rows with "series" and "y" fields.
+
+        Rows keep their "x" and "yN" fields, so tooltips can list every series.
+        """
+        return {
+            "fold": [f"y{i}" for i in range(len(self.y_serieses))],
+            "as": ["series", "y"],
+        }
+
+    @property
+    def is_dense(self) -> bool:
+        """True if a circle per datum would overlap or overload the client.
 
-        x_encoding = self.to_vega_x_encoding()
+        Dense charts draw lines without circles, and hover finds the nearest
+        X (not the nearest of every datum).
+        """
+        n_rows = len(self.x_series.series)
+        return (
+            n_rows * MinPointMarkSpacing > ExpectedPlotWidth
+            or n_rows * len(self.y_serieses) > MaxPointMarks
+        )
+
+    def to_vega_data(self) -> Dict[str, Any]:
+        """Build the Vega-Lite "data" part of the spec: the expensive part.
+
+        It only depends on X and Y values (and `temporal_encoding`), so it
+        can be reused when only presentation (title, labels, colors) changes.
+        """
+        with _stage("to_vega_data") as info:
+            values = self.to_vega_inline_data()
+            if _is_observed():
+                info["n_series"] = len(self.y_serieses)
+                info["n_rows"] = len(values)
+                info["n_points"] = sum(int(y.series.count()) for y in self.y_serieses)
+            return {"values": values}
+
+    def to_arrow_table(self) -> pa.Table:
+        """Build the Arrow equivalent of `to_vega_inline_data()`.
+
+        Columns are "x,y0,y1,...", like the inline records. Numbers and
+        epoch-ms X values are float64 (JavaScript's number type); text X
+        values are utf8. Null Y values are Arrow nulls.
+        """
+        arrays = []
+        for values in [self.x_json_values, *(y.series for y in self.y_serieses)]:
+            if is_numeric_dtype(values.dtype):
+                array = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                arrays.append(pa.array(array, from_pandas=True))
+            else:
+                arrays.append(pa.array(values.to_numpy(), type=pa.utf8()))
+        return pa.Table.from_arrays(
+            arrays, names=["x", *(f"y{i}" for i in range(len(self.y_serieses)))]
+        )
+
+    def to_arrow_ipc(self) -> bytes:
+        """Serialize `to_arrow_table()` in the Arrow IPC stream format."""
+        table = self.to_arrow_table()
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def to_vega_arrow_data(self) -> Dict[str, Any]:
+        """Build a Vega-Lite "data" part that points to `to_arrow_ipc()` data.
+
+        The client must register Vega's arrow loader and replace the
+        ARROW_DATA_URL placeholder with the URL of the Arrow data.
+        """
+        return {"url": ARROW_DATA_URL, "format": {"type": "arrow"}}
+
+    def to_vega(
+        self,
+        data: Optional[Dict[str, Any]] = None,
+        *,
+        on_stage: Optional[Callable[[StageMetrics], None]] = None,
+    ) -> Dict[str, Any]:
+        """Build a Vega line chart.
+
+        Pass `data` (from `to_vega_data()`) to reuse data from another Chart
+        with the same X and Y values. Otherwise, we build it.
+
+        Pass `on_stage` to receive StageMetrics for "to_vega" and (if we
+        build data) "to_vega_data".
+        """
+        if on_stage is not None:
+            with _observing(_StageTimer(on_stage)):
+                return self.to_vega(data)
+
+        with _stage("to_vega"):
+            if data is None:
+                data = self.to_vega_data()
+            return self._build_vega_spec(data)
+
+    def _build_vega_spec(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        x_encoding, x_label_metrics = self._to_vega_x_encoding_and_label_metrics()
         if "labelExpr" in x_encoding["axis"]:
             tooltip_extras = {
                 "scale": {"type": "utc"},
@@ -345,42 +1521,50 @@ class Chart(NamedTuple):
         else:
             tooltip_extras = {}
 
-        LABEL_COLOR = "#383838"
-        TITLE_COLOR = "#686768"
-        HOVER_COLOR = TITLE_COLOR
-        GRID_COLOR = "#ededed"
+        n_series = len(self.y_serieses)
+        skeleton = _vega_spec_skeleton(
+            _VegaSpecShape(
+                self.y_axis_tick_format,
+                n_series,
+                self.series_layout,
+                self.is_dense,
+                self.theme,
+            )
+        )
+        color_scale = self.to_vega_color_scale()
+        color_legend = self.to_vega_color_legend()
+        if self.series_layout == "fold":
+            line, rule, point = skeleton.layers
+            layers = [
+                _with_encoding(line, "color", scale=color_scale, legend=color_legend),
+                rule,
+                _with_encoding(point, "fill", scale=color_scale, legend=None),
+            ]
+        else:
+            lines = skeleton.layers[:n_series]
+            points = skeleton.layers[n_series + 1 :]
+            layers = [
+                _with_encoding(
+                    lines[0], "color", scale=color_scale, legend=color_legend
+                ),
+                *lines[1:],
+                skeleton.layers[n_series],  # rule
+                *[
+                    {**point, "mark": {**point["mark"], "fill": y_series.color}}
+                    for point, y_series in zip(points, self.y_serieses)
+                ],
+            ]
+
         ret = {
             "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
             "title": self.title,
-            "config": {
-                "font": "Roboto, Helvetica, sans-serif",
-                "title": {
-                    "offset": 15,
-                    "color": LABEL_COLOR,
-                    "fontSize": 20,
-                    "fontWeight": "normal",
-                },
-                "axis": {
-                    "tickSize": 3,
-                    "tickColor": GRID_COLOR,  # fade into grid
-                    "titlePadding": 20,
-                    "titleFontSize": 15,
-                    "titleFontWeight": "normal",
-                    "titleColor": TITLE_COLOR,
-                    "labelColor": LABEL_COLOR,
-                    "labelFontSize": 12,
-                    "labelPadding": 10,
-                    "gridColor": GRID_COLOR,
-                    "domain": False,  # no bold lines along left + bottom
-                },
-                "axisY": {
-                    "format": self.y_axis_tick_format,
-                    "tickCount": {"expr": "ceil(height/100)"},  # fewer lines
-                },
-            },
-            "data": {
-                "values": self.to_vega_inline_data(),
-            },
+            "config": skeleton.config,
+            "data": data,
+            **(
+                {"transform": [self.to_vega_fold_transform()]}
+                if self.series_layout == "fold"
+                else {}
+            ),
             "encoding": {
                 "x": x_encoding,  # for all layers
                 "y": self.to_vega_y_encoding(),  # for all layers
@@ -400,138 +1584,133 @@ class Chart(NamedTuple):
                     ],
                 ],
             },
-            "layer": [
-                # Each column gets two layers:
-                #
-                # 1. a "line" layer, with the line, point and legend details
-                # 2. a "point" layer, only shown when hovering
-                #
-                # There's also a "hover" layer (a vertical "rule") in between.
-                #
-                # For three columns, the layers are (from bottom to top):
-                #
-                # * y0-line (with a point)
-                # * y1-line (with a point)
-                # * y2-line (with a point)
-                # * rule (on hover)
-                # * y0-point (on hover)
-                # * y1-point (on hover)
-                # * y2-point (on hover)
-                #
-                # All the "hover" stuff appears on _top_ of all the not-hover
-                # stuff. That breaks spatial rules a bit (y1-point can appear
-                # atop y0-line, on hover), for the sake of readability (the
-                # user _wants_ to see y1-point on hover).
-                *[
-                    {
-                        "mark": {
-                            # yN-line
-                            "type": "line",
-                            "point": {
-                                # There's always a visible dot (this one). The
-                                # yN-point layer draws _another_ dot on top.
-                                # (Rationale: we can't control this point's
-                                # color separately from its line's color.)
-                                "shape": "circle",
-                                "size": 36,
-                            },
-                        },
-                        "encoding": {
-                            "y": {
-                                "field": f"y{i}",
-                                "type": "quantitative",
-                            },
-                            "color": {
-                                # This would normally be a constant, but one
-                                # vega-lite side-effect is to populate the
-                                # legend.
-                                "datum": f"y{i}",
-                                **(
-                                    {
-                                        "scale": self.to_vega_color_scale(),
-                                        "legend": self.to_vega_color_legend(),
-                                    }
-                                    if i == 0
-                                    else {}
-                                ),
-                            },
-                        },
-                    }
-                    for i, y_series in enumerate(self.y_serieses)
-                ],
-                {
-                    # https://vega.github.io/vega-lite/examples/interactive_multi_line_tooltip.html
-                    #
-                    # The "rule" layer (vertical line) is before all the "line"
-                    # layers so the lines are drawn on top of the rule.
-                    "mark": {
-                        # rule
-                        "type": "rule",
-                        "strokeWidth": 2,
-                        "color": HOVER_COLOR,
-                    },
-                    "selection": {
-                        "hover": {
-                            "type": "single",
-                            "on": "mouseover",
-                            "empty": "none",
-                            # https://vega.github.io/vega-lite/docs/nearest.html
-                            "nearest": True,
-                            "clear": "mouseout",
-                        },
-                    },
-                    "encoding": {
-                        # Only the selected ("hover") rule has opacity
-                        "opacity": {
-                            "condition": {
-                                "selection": "hover",
-                                "value": 1,
-                            },
-                            "value": 0,
-                        },
-                    },
-                },
-                *[
-                    {
-                        "mark": {
-                            # yN-point
-                            "type": "point",
-                            "size": 49,
-                            "fill": y_series.color,
-                            "strokeWidth": 2,
-                            "stroke": HOVER_COLOR,
-                        },
-                        "encoding": {
-                            "y": {
-                                # repeated
-                                "field": f"y{i}",
-                                "type": "quantitative",
-                            },
-                            "opacity": {
-                                # Only the selected ("hover") yN-point has opacity
-                                "condition": {"selection": "hover", "value": 1},
-                                "value": 0,
-                            },
-                        },
-                    }
-                    for i, y_series in enumerate(self.y_serieses)
-                ],
-            ],
+            "layer": layers,
         }
 
-        if self.y_axis_tick_format[-1] == "d":
-            ret["config"]["axisY"]["tickMinStep"] = 1
-
-        if len(self.y_serieses) > 1:
-            ret["config"]["legend"] = {
-                "rowPadding": 10,
-                "labelFontSize": 12,
-                "labelColor": LABEL_COLOR,
-            }
+        usermeta = {}
+        if self.theme == "client":
+            usermeta["theme"] = THEME_VERSION
+        if x_label_metrics is not None:
+            usermeta["xAxisLabels"] = x_label_metrics
+        if usermeta:
+            ret["usermeta"] = usermeta
 
         return ret
 
 
+def _mask_numeric_columns(
+    table: pd.DataFrame, names: List[str], mask: np.ndarray
+) -> Tuple[List[pd.Series], List[int]]:
+    """Select `mask` rows of numeric columns; count their non-null values.
+
+    Columns that share a NumPy dtype are masked as one 2-D block: we convert
+    `mask` to row numbers once, copy each value once into the block, and
+    count non-nulls with one reduction. Each returned Series is a view of a
+    block row. If `mask` selects every row, we return the table's columns
+    without copying.
+
+    Columns with pandas extension dtypes are masked one by one.
+    """
+    ret_series: List[Optional[pd.Series]] = [None] * len(names)
+    ret_counts = [0] * len(names)
+
+    select_all = bool(mask.all()) and table.index.equals(pd.RangeIndex(len(table)))
+    if not select_all:
+        rows = np.flatnonzero(mask)
+
+    groups: Dict[np.dtype, List[int]] = {}  # dtype => indexes into names
+    for i, name in enumerate(names):
+        dtype = table[name].dtype
+        if isinstance(dtype, np.dtype):
+            groups.setdefault(dtype, []).append(i)
+        else:
+            series = table[name][mask]
+            series.reset_index(drop=True, inplace=True)
+            ret_series[i] = series
+            ret_counts[i] = int(series.count())
+
+    for dtype, indexes in groups.items():
+        if select_all:
+            arrays = [table[names[i]].to_numpy() for i in indexes]
+        else:
+            block = np.empty((len(indexes), len(rows)), dtype=dtype)
+            for j, i in enumerate(indexes):
+                np.take(table[names[i]].to_numpy(), rows, out=block[j])
+            arrays = list(block)  # views
+
+        if dtype.kind == "f":
+            if select_all:
+                counts = [len(a) - np.count_nonzero(np.isnan(a)) for a in arrays]
+            else:
+                counts = block.shape[1] - np.count_nonzero(np.isnan(block), axis=1)
+        else:
+            counts = [len(arrays[0])] * len(indexes)  # ints and bools: no nulls
+
+        for i, array, count in zip(indexes, arrays, counts):
+            if select_all:
+                ret_series[i] = table[names[i]]
+            else:
+                ret_series[i] = pd.Series(array, name=names[i], copy=False)
+            ret_counts[i] = int(count)
+
+    return ret_series, ret_counts
+
+
+def _arrow_column(table: pa.Table, name: str) -> pa.Array:
+    """Read a column as one Array: zero-copy, unless it has many chunks."""
+    column = table.column(name)
+    if column.num_chunks == 1:
+        return column.chunk(0)
+    else:
+        return column.combine_chunks()
+
+
+def _arrow_to_series(array: pa.Array, column_type: str, name: str) -> pd.Series:
+    """Convert a null-free Arrow array to the Series `render()` would see.
+
+    Numbers and timestamps are zero-copy. Dates become period[D], like
+    Workbench's pandas dates. Text becomes object (or category, if
+    dictionary-encoded).
+    """
+    if column_type == "number":
+        return pd.Series(array.to_numpy(), name=name, copy=False)
+    elif column_type == "timestamp":
+        values = array.cast(pa.timestamp("ns")).to_numpy()
+        return pd.Series(values, name=name, copy=False)
+    elif column_type == "date":
+        days = array.cast(pa.int32()).to_numpy().astype(np.int64)
+        return pd.Series(pd.arrays.PeriodArray(days, freq="D"), name=name)
+    else:  # text
+        return array.to_pandas().rename(name)
+
+
+def _is_arrow_numeric(data_type: pa.DataType) -> bool:
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def _mask_arrow_numeric_columns(
+    arrays: List[pa.Array], names: List[str], mask: Optional[pa.BooleanArray]
+) -> Tuple[List[pd.Series], List[int]]:
+    """Select `mask` rows of numeric arrays; count their non-null values.
+
+    Like `_mask_numeric_columns()`. `mask=None` means, "all rows": then
+    null-free arrays are not copied. Nulls become NaN.
+    """
+    ret_series = []
+    ret_counts = []
+    for array, name in zip(arrays, names):
+        if mask is not None:
+            array = array.filter(mask)
+        values = array.to_numpy(zero_copy_only=False)
+        if values.dtype.kind == "f":
+            count = len(values) - int(np.count_nonzero(np.isnan(values)))
+        else:
+            count = len(values)  # ints without nulls
+        ret_series.append(pd.Series(values, name=name, copy=False))
+        ret_counts.append(count)
+    return ret_series, ret_counts
+
+
 class YColumn(NamedTuple):
     column: str
     color: str
@@ -545,27 +1724,82 @@ class Form(NamedTuple):
     y_axis_label: str
     x_column: str
     y_columns: List[YColumn]
+    max_points: int = 0
+    """Each series picks this many points (see `_downsample()`); 0 means, "all"."""
+    downsample: str = "lttb"
+    """Downsampling algorithm: "lttb" (smooth) or "m4" (keep extremes)."""
 
     @classmethod
     def from_params(cls, *, y_columns: List[Dict[str, str]], **kwargs):
         return cls(**kwargs, y_columns=[YColumn(**d) for d in y_columns])
 
-    def _make_x_series_and_mask(
-        self, table: pd.DataFrame, input_columns: Dict[str, Any]
-    ) -> Tuple[XSeries, np.array]:
-        """Create an XSeries ready for charting, or raise GentleValueError."""
+    @property
+    def column_names(self) -> List[str]:
+        """Names of the input columns this Form reads: X, then Ys."""
+        return [self.x_column, *(ycolumn.column for ycolumn in self.y_columns)]
+
+    def check_metadata(self, input_columns: Dict[str, Any]) -> None:
+        """Raise GentleValueError if we can tell, without data, we can't chart.
+
+        This finds a missing X column, missing Y columns, a Y column that is
+        the X column and a non-"number" Y column. It only reads params and
+        `input_columns` metadata, so it takes microseconds. Y columns missing
+        from `input_columns` are left for `make_chart()` to check.
+        """
         if not self.x_column:
             raise GentleValueError(
                 i18n.trans("noXAxisError.message", "Please choose an X-axis column")
             )
+        self._check_y_columns(
+            lambda name: name not in input_columns
+            or input_columns[name].type == "number"
+        )
+
+    def _make_x_series_and_mask(
+        self, table: pd.DataFrame, input_columns: Dict[str, Any]
+    ) -> Tuple[XSeries, np.array]:
+        """Create an XSeries ready for charting, or raise GentleValueError."""
 
         series = table[self.x_column]
         column = input_columns[self.x_column]
-        nulls = series.isna()
-        safe_x_values = series[~nulls]  # so we can min(), len(), etc
-        safe_x_values.reset_index(drop=True, inplace=True)
+        nulls = series.isna().to_numpy()
+        null_count = int(np.count_nonzero(nulls))
+        if null_count:
+            safe_x_values = series[~nulls]  # so we can min(), len(), etc
+            safe_x_values.reset_index(drop=True, inplace=True)
+        elif series.index.equals(pd.RangeIndex(len(series))):
+            safe_x_values = series  # no copy
+        else:
+            safe_x_values = series.reset_index(drop=True)
+        profile = ColumnProfile.from_values(safe_x_values, column.type, null_count)
+        self._check_x_profile(column, profile)
+        return XSeries(safe_x_values, column, profile), ~nulls
+
+    def _make_x_series_and_mask_from_arrow(
+        self, table: pa.Table, input_columns: Dict[str, Any]
+    ) -> Tuple[XSeries, Optional[pa.BooleanArray]]:
+        """Like `_make_x_series_and_mask()`, reading an Arrow column.
+
+        The mask is None if X has no nulls (or NaNs): all rows are charted.
+        """
 
-        if column.type == "text" and len(safe_x_values) > MaxNAxisLabels:
+        array = _arrow_column(table, self.x_column)
+        column = input_columns[self.x_column]
+        nulls = pc.is_null(array, nan_is_null=True)
+        null_count = pc.sum(nulls).as_py() or 0
+        if null_count:
+            mask = pc.invert(nulls)
+            array = array.filter(mask)
+        else:
+            mask = None
+        safe_x_values = _arrow_to_series(array, column.type, self.x_column)
+        profile = ColumnProfile.from_values(safe_x_values, column.type, null_count)
+        self._check_x_profile(column, profile)
+        return XSeries(safe_x_values, column, profile), mask
+
+    def _check_x_profile(self, column: Any, profile: ColumnProfile) -> None:
+        """Raise GentleValueError if we cannot chart the X column."""
+        if column.type == "text" and profile.non_null_count > MaxNAxisLabels:
             raise GentleValueError(
                 i18n.trans(
                     "tooManyTextValuesError.message",
@@ -573,12 +1807,12 @@ class Form(NamedTuple):
                     'Please change the input table to have 10 or fewer rows, or convert "{x_column}" to number or date.',
                     {
                         "x_column": self.x_column,
-                        "n_safe_x_values": len(safe_x_values),
+                        "n_safe_x_values": profile.non_null_count,
                     },
                 )
             )
 
-        if not len(safe_x_values):
+        if not profile.non_null_count:
             raise GentleValueError(
                 i18n.trans(
                     "noValuesError.message",
@@ -587,7 +1821,7 @@ class Form(NamedTuple):
                 )
             )
 
-        if not len(safe_x_values[safe_x_values != safe_x_values[0]]):
+        if not profile.has_two_distinct:
             raise GentleValueError(
                 i18n.trans(
                     "onlyOneValueError.message",
@@ -596,8 +1830,6 @@ class Form(NamedTuple):
                 )
             )
 
-        return XSeries(safe_x_values, column), ~nulls
-
     def make_chart(self, table: pd.DataFrame, input_columns: Dict[str, Any]) -> Chart:
         """Create a Chart ready for charting, or raise GentleValueError.
 
@@ -614,15 +1846,176 @@ class Form(NamedTuple):
         * Error if a Y column is the X column
         * Error if a Y column has fewer than 1 non-missing value
         * Default title, X and Y axis labels
+        * Downsample (if max_points > 0): keep the rows any Y series picks as
+          one of its max_points points, using LTTB or M4
+
+        Errors we can find from metadata alone (see `check_metadata()`) are
+        raised before we read any data.
         """
-        x_series, mask = self._make_x_series_and_mask(table, input_columns)
+        self.check_metadata(input_columns)
+        with _stage("make_x_series_and_mask") as info:
+            x_series, mask = self._make_x_series_and_mask(table, input_columns)
+            info["rows_in"] = len(table)
+            info["rows_out"] = len(x_series.series)
+        self._check_y_columns(lambda name: is_numeric_dtype(table[name].dtype))
+
+        with _stage("mask_y_columns") as info:
+            # line up with x_series
+            y_values, y_counts = _mask_numeric_columns(
+                table, [ycolumn.column for ycolumn in self.y_columns], mask
+            )
+            info["n_series"] = len(y_values)
+            info["rows_out"] = len(x_series.series)
+
+        return self._finish_chart(x_series, y_values, y_counts, input_columns)
+
+    def make_chart_from_arrow(
+        self, table: pa.Table, input_columns: Dict[str, Any]
+    ) -> Chart:
+        """Like `make_chart()`, reading only our columns of an Arrow table."""
+        self.check_metadata(input_columns)
+        with _stage("make_x_series_and_mask") as info:
+            x_series, mask = self._make_x_series_and_mask_from_arrow(
+                table, input_columns
+            )
+            info["rows_in"] = table.num_rows
+            info["rows_out"] = len(x_series.series)
+        self._check_y_columns(
+            lambda name: _is_arrow_numeric(table.schema.field(name).type)
+        )
+        y_names = [ycolumn.column for ycolumn in self.y_columns]
+        with _stage("mask_y_columns") as info:
+            y_values, y_counts = _mask_arrow_numeric_columns(
+                [_arrow_column(table, name) for name in y_names], y_names, mask
+            )
+            info["n_series"] = len(y_values)
+            info["rows_out"] = len(x_series.series)
+        return self._finish_chart(x_series, y_values, y_counts, input_columns)
+
+    def make_chart_from_arrow_file(
+        self, reader: pa.ipc.RecordBatchFileReader, input_columns: Dict[str, Any]
+    ) -> Chart:
+        """Like `make_chart_from_arrow()`, reading one record batch at a time.
+
+        Pass 1 profiles X, so we can raise X and Y errors (including
+        MaxNAxisLabels) before reading Y data. Pass 2 drops null-X rows and, if we
+        will downsample with M4, pre-reduces each batch with
+        `_m4_bin_candidates()`. Memory is bounded by the reduced rows, not by the
+        file's row count. Finally, `make_chart_from_arrow()` validates and
+        downsamples as usual.
+
+        LTTB picks points by comparing neighboring buckets, so no per-batch
+        reduction preserves its output: we read every non-null-X row, and the
+        chart matches `make_chart_from_arrow()`'s. Memory scales with the
+        file's non-null rows. Without downsampling, every non-null-X row is
+        charted, so memory scales with the chart's output size.
+        """
+        self.check_metadata(input_columns)
+        schema = reader.schema
+        column = input_columns[self.x_column]
+        names = list(dict.fromkeys(self.column_names))  # X first; no dups
+        x_index = schema.get_field_index(self.x_column)
+        if x_index == -1:
+            raise KeyError(self.x_column)
+
+        def read_batches(indexes: List[int]) -> Iterator[Tuple[List[pa.Array], int]]:
+            """Yield (arrays, n_null_x) per batch; drop rows with null X."""
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                arrays = [batch.column(index) for index in indexes]
+                nulls = pc.is_null(arrays[0], nan_is_null=True)
+                n_nulls = pc.sum(nulls).as_py() or 0
+                if n_nulls:
+                    valid = pc.invert(nulls)
+                    arrays = [array.filter(valid) for array in arrays]
+                yield arrays, n_nulls
+
+        # Pass 1: profile X
+        null_count = 0
+        non_null_count = 0
+        x_min = x_max = None
+        text_values = set()  # up to 2 distinct values
+        for (x,), n_nulls in read_batches([x_index]):
+            null_count += n_nulls
+            non_null_count += len(x)
+            if not len(x):
+                continue
+            if column.type == "text":
+                if len(text_values) < 2:
+                    text_values.update(pc.unique(x).to_pylist()[:2])
+            else:
+                positions = _numeric_positions(
+                    _arrow_to_series(x, column.type, self.x_column), column.type
+                )
+                batch_min, batch_max = positions.min(), positions.max()
+                x_min = batch_min if x_min is None else min(x_min, batch_min)
+                x_max = batch_max if x_max is None else max(x_max, batch_max)
+        if column.type == "text":
+            has_two_distinct = len(text_values) > 1
+        else:
+            has_two_distinct = non_null_count > 0 and x_min != x_max
+        self._check_x_profile(
+            column,
+            ColumnProfile(
+                null_count, non_null_count, x_min, x_max, has_two_distinct, False
+            ),
+        )
+        self._check_y_columns(lambda name: _is_arrow_numeric(schema.field(name).type))
+
+        # Pass 2: X and Y, null-free X, pre-reduced if we'll downsample with M4
+        reduce = (
+            self.max_points > 0
+            and self.downsample == "m4"
+            and column.type != "text"
+            and non_null_count > self.max_points
+        )
+        n_bins = _m4_n_bins(self.max_points)  # the final M4 pass's bins
+        max_pending_rows = 32 * n_bins * len(names)
+        parts: List[pa.RecordBatch] = []
+        n_pending_rows = 0
+
+        def pre_reduce(arrays: List[pa.Array]) -> pa.RecordBatch:
+            positions = _numeric_positions(
+                _arrow_to_series(arrays[0], column.type, self.x_column), column.type
+            )
+            ys = [
+                array.to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+                for array in arrays[1:]
+            ]
+            rows = pa.array(_m4_bin_candidates(positions, ys, x_min, x_max, n_bins))
+            return pa.RecordBatch.from_arrays(
+                [array.take(rows) for array in arrays], names=names
+            )
 
+        indexes = [schema.get_field_index(name) for name in names]
+        for arrays, _ in read_batches(indexes):
+            if reduce:
+                part = pre_reduce(arrays)
+            else:
+                part = pa.RecordBatch.from_arrays(arrays, names=names)
+            parts.append(part)
+            n_pending_rows += part.num_rows
+            if reduce and n_pending_rows > max_pending_rows:
+                combined = pa.Table.from_batches(parts).combine_chunks()
+                parts = [pre_reduce([_arrow_column(combined, name) for name in names])]
+                n_pending_rows = parts[0].num_rows
+        if reduce and len(parts) > 1:
+            # Candidates of each part aren't all candidates of the whole
+            combined = pa.Table.from_batches(parts).combine_chunks()
+            parts = [pre_reduce([_arrow_column(combined, name) for name in names])]
+
+        table = pa.Table.from_batches(
+            parts, schema=pa.schema([schema.field(name) for name in names])
+        )
+        return self.make_chart_from_arrow(table, input_columns)
+
+    def _check_y_columns(self, is_numeric: Callable[[str], bool]) -> None:
+        """Raise GentleValueError if we cannot chart the chosen Y columns."""
         if not self.y_columns:
             raise GentleValueError(
                 i18n.trans("noYAxisError.message", "Please choose a Y-axis column")
             )
 
-        y_serieses = []
         for ycolumn in self.y_columns:
             if ycolumn.column == self.x_column:
                 raise GentleValueError(
@@ -633,9 +2026,7 @@ class Form(NamedTuple):
                     )
                 )
 
-            series = table[ycolumn.column]
-
-            if not is_numeric_dtype(series.dtype):
+            if not is_numeric(ycolumn.column):
                 raise GentleValueError(
                     i18n.trans(
                         "axisNotNumericError.message",
@@ -645,13 +2036,20 @@ class Form(NamedTuple):
                     )
                 )
 
-            series = series[mask]  # line up with x_series
-            series.reset_index(drop=True, inplace=True)
-
+    def _finish_chart(
+        self,
+        x_series: XSeries,
+        y_values: List[pd.Series],
+        y_counts: List[int],
+        input_columns: Dict[str, Any],
+    ) -> Chart:
+        """Build a Chart from X and Y values that are lined up and null-free."""
+        y_serieses = []
+        for ycolumn, series, count in zip(self.y_columns, y_values, y_counts):
             # Find how many Y values can actually be plotted on the X axis. If
             # there aren't going to be any Y values on the chart, raise an
             # error.
-            if not series.count():
+            if not count:
                 raise GentleValueError(
                     i18n.trans(
                         "emptyAxisError.message",
@@ -664,6 +2062,48 @@ class Form(NamedTuple):
                 YSeries(series, ycolumn.color, input_columns[ycolumn.column].format)
             )
 
+        if self.max_points > 0:
+            with _stage("downsample") as info:
+                info["rows_in"] = len(x_series.series)
+                x_series, y_serieses = _downsample(
+                    x_series, y_serieses, self.max_points, self.downsample
+                )
+                info["rows_out"] = len(x_series.series)
+
+        return self._style_chart(x_series, y_serieses)
+
+    def without_presentation(self) -> Form:
+        """Hashable copy of this Form, minus fields that don't affect data.
+
+        Two Forms with equal `without_presentation()` produce Charts with the
+        same X and Y values: only title, labels and colors may differ.
+        """
+        return self._replace(
+            title="",
+            x_axis_label="",
+            y_axis_label="",
+            y_columns=tuple(YColumn(y.column, "") for y in self.y_columns),
+        )
+
+    def restyle_chart(self, chart: Chart) -> Chart:
+        """Apply this Form's title, labels and colors to `chart`.
+
+        `chart` must come from a Form with the same `without_presentation()`.
+        This skips all the data work of `make_chart()`.
+        """
+        return self._style_chart(
+            chart.x_series,
+            [
+                y_series._replace(color=ycolumn.color)
+                for y_series, ycolumn in zip(chart.y_serieses, self.y_columns)
+            ],
+        )._replace(
+            temporal_encoding=chart.temporal_encoding,
+            series_layout=chart.series_layout,
+            theme=chart.theme,
+        )
+
+    def _style_chart(self, x_series: XSeries, y_serieses: List[YSeries]) -> Chart:
         title = self.title or "Line Chart"
         x_axis_label = self.x_axis_label or x_series.name
         if len(y_serieses) == 1:
@@ -682,18 +2122,681 @@ class Form(NamedTuple):
         )
 
 
-def render(table, params, *, input_columns):
-    form = Form.from_params(**params)
+def _fingerprint_columns(
+    table: pd.DataFrame, column_names: List[str], input_columns: Dict[str, Any]
+) -> bytes:
+    """Hash the values and metadata of the named columns of `table`.
+
+    Numeric and datetime buffers are hashed as raw bytes (fast); other
+    columns (text, categorical, period) are hashed value-by-value by pandas.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for name in column_names:
+        if name not in table:
+            continue  # make_chart() will complain
+        series = table[name]
+        column = input_columns.get(name)
+        h.update(repr((name, str(series.dtype), len(series))).encode("utf-8"))
+        if column is not None:
+            h.update(repr((column.type, column.format)).encode("utf-8"))
+        if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufmM":
+            h.update(np.ascontiguousarray(series.to_numpy()).view(np.uint8))
+        else:
+            h.update(pd.util.hash_pandas_object(series, index=False).to_numpy())
+    return h.digest()
+
+
+def _fingerprint_arrow_columns(
+    table: pa.Table, column_names: List[str], input_columns: Dict[str, Any]
+) -> bytes:
+    """Hash the values and metadata of the named columns of an Arrow table.
+
+    Like `_fingerprint_columns()`, but every column is hashed as raw bytes:
+    each chunk's offset, length and buffers (including dictionaries).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(b"arrow")  # never collide with a _fingerprint_columns() result
+    for name in column_names:
+        if name not in table.column_names:
+            continue  # make_chart_from_arrow() will complain
+        chunked = table.column(name)
+        column = input_columns.get(name)
+        h.update(repr((name, str(chunked.type), len(chunked))).encode("utf-8"))
+        if column is not None:
+            h.update(repr((column.type, column.format)).encode("utf-8"))
+        for chunk in chunked.chunks:
+            arrays = [chunk]
+            if pa.types.is_dictionary(chunk.type):
+                arrays.append(chunk.dictionary)
+            for array in arrays:
+                h.update(repr((array.offset, len(array))).encode("utf-8"))
+                for buffer in array.buffers():
+                    h.update(b"-" if buffer is None else memoryview(buffer))
+    return h.digest()
+
+
+def _fingerprint_file(
+    path: os.PathLike, column_names: List[str], input_columns: Dict[str, Any]
+) -> bytes:
+    """Hash a file's identity and the metadata of the named columns.
+
+    We trust the file's path, size and mtime instead of reading its data:
+    hashing every byte would defeat the point of memory-mapping it.
+    """
+    stat = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(b"file")  # never collide with other fingerprints
+    h.update(
+        repr((os.path.realpath(path), stat.st_size, stat.st_mtime_ns)).encode("utf-8")
+    )
+    for name in column_names:
+        column = input_columns.get(name)
+        if column is not None:
+            h.update(repr((name, column.type, column.format)).encode("utf-8"))
+    return h.digest()
+
+
+def _estimate_nbytes(json_dict: Dict[str, Any]) -> int:
+    """Guess how much memory a render() JSON dict occupies.
+
+    We size one data record and multiply: good enough for cache eviction.
+    """
+    values = json_dict.get("data", {}).get("values", [])
+    if not values:
+        return 10_000  # the spec skeleton
+    record = values[0]
+    record_nbytes = sys.getsizeof(record) + sum(
+        sys.getsizeof(v) for v in record.values()
+    )
+    return 10_000 + len(values) * (record_nbytes + 8)  # +8: list pointer
+
+
+class RenderCache:
+    """In-process LRU cache of render() results.
+
+    Keys are fingerprints of the X and Y columns' values plus the normalized
+    Form, so renders of an unchanged step are a hash and a lookup.
+
+    Entries are evicted least-recently-used-first when there are more than
+    `max_entries` or they (approximately) exceed `max_bytes`.
+
+    Entries hold charts, Vega data and JSON bytes, never a returned spec:
+    render() builds a new dict on every hit, so callers may modify it.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries: OrderedDict[Any, Tuple[Any, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Any) -> Optional[Any]:
+        try:
+            value, _ = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Any, value: Any, nbytes: int) -> None:
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[1]
+        if self.max_entries <= 0 or nbytes > self.max_bytes:
+            return  # never fits
+        self._entries[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= evicted_nbytes
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+render_cache = RenderCache()
+"""The cache render() uses. Set `render_cache.max_entries = 0` to disable."""
+
+chart_data_cache = RenderCache(max_entries=8)
+"""Charts and their Vega data, keyed without presentation fields.
+
+When a user only changes title, labels or colors, render() restyles the
+cached Chart and reuses its data instead of calling make_chart(). Each spec
+gets its own copy of the records, so restyled specs share nothing.
+"""
+
+
+def _render_with_arrow_data(
+    form: Form,
+    make_chart: Callable[[], Chart],
+    fingerprint: bytes,
+    arrow_data_path,
+    spec_options: Dict[str, str],
+) -> Tuple[Any, Dict[str, Any]]:
+    """Write an Arrow sidecar file; return (error, spec) referencing it."""
+    cache_key = (
+        form._replace(y_columns=tuple(form.y_columns)),
+        "arrow",
+        tuple(spec_options.items()),
+        fingerprint,
+    )
+    cached = render_cache.get(cache_key)
+    if cached is None:
+        try:
+            chart = _make_chart_stage(make_chart)
+        except GentleValueError as err:
+            cached = (err.i18n_message, None, None)
+            render_cache.put(cache_key, cached, 1_000)
+        else:
+            chart = chart._replace(temporal_encoding="epoch-ms", **spec_options)
+            with _stage("to_arrow_ipc") as info:
+                arrow_bytes = chart.to_arrow_ipc()
+                info["nbytes"] = len(arrow_bytes)
+            cached = ("", chart, arrow_bytes)
+            nbytes = len(arrow_bytes) + _chart_series_nbytes(chart)
+            render_cache.put(cache_key, cached, nbytes)
+
+    message, chart, arrow_bytes = cached
+    if message:
+        return message, _error_json("dict")
+    arrow_data_path.write_bytes(arrow_bytes)
+    return "", chart.to_vega(data=chart.to_vega_arrow_data())
+
+
+_ERROR_JSON = {
+    "error": "Please correct the error in this step's data or parameters"
+}  # TODO_i18n
+
+
+def _error_json(output_format: str) -> Any:
+    """Return _ERROR_JSON in `output_format`."""
+    if output_format == "dict":
+        return dict(_ERROR_JSON)  # the caller may modify it
+    json_bytes = json.dumps(_ERROR_JSON).encode("utf-8")
+    if output_format == "json-chunks":
+        return iter([json_bytes])
+    return json_bytes
+
+
+def _copy_vega_data(vega_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy `Chart.to_vega_data()`'s records, so callers may modify them.
+
+    Records are flat dicts of JSON scalars: a shallow copy of each will do,
+    and it costs a fraction of building them again.
+    """
+    return {**vega_data, "values": [dict(record) for record in vega_data["values"]]}
+
+
+def _chart_series_nbytes(chart: Chart) -> int:
+    """Count the bytes of a Chart's X and Y values, for cache accounting."""
+    return sum(
+        s.series.memory_usage(index=False) for s in [chart.x_series, *chart.y_serieses]
+    )
+
+
+def _make_chart_stage(make_chart: Callable[[], Chart]) -> Chart:
+    with _stage("make_chart") as info:
+        chart = make_chart()
+        info["rows_out"] = len(chart.x_series.series)
+        info["n_series"] = len(chart.y_serieses)
+        return chart
+
+
+def _render_form(
+    form: Form,
+    input_columns: Dict[str, Any],
+    make_chart: Callable[[], Chart],
+    fingerprint: Callable[[], bytes],
+    *,
+    temporal_encoding: str,
+    output_format: str,
+    arrow_data_path,
+    series_layout: str,
+    theme: str,
+    on_stage: Optional[Callable[[StageMetrics], None]],
+) -> Tuple[Any, Any]:
+    """Render (error, spec), using caches; see `render()` for the options.
+
+    `make_chart()` builds the Chart (or raises GentleValueError), and
+    `fingerprint()` hashes the input columns it reads. We call neither if
+    `form.check_metadata(input_columns)` fails.
+    """
+    options = dict(
+        temporal_encoding=temporal_encoding,
+        output_format=output_format,
+        arrow_data_path=arrow_data_path,
+        # Chart fields that only change the spec, not its data
+        spec_options=dict(series_layout=series_layout, theme=theme),
+    )
+    if on_stage is None:
+        return _render_form_stages(
+            form, input_columns, make_chart, fingerprint, **options
+        )
+
+    timer = _StageTimer(on_stage)
+    with _observing(timer), _stage("render"):
+        message, spec = _render_form_stages(
+            form, input_columns, make_chart, fingerprint, **options
+        )
+    if output_format == "json-chunks":
+        spec = _observe_chunks(spec, timer)
+    return message, spec
+
+
+def _render_form_stages(
+    form: Form,
+    input_columns: Dict[str, Any],
+    make_chart: Callable[[], Chart],
+    fingerprint: Callable[[], bytes],
+    *,
+    temporal_encoding: str,
+    output_format: str,
+    arrow_data_path,
+    spec_options: Dict[str, str],
+) -> Tuple[Any, Any]:
     try:
-        chart = form.make_chart(table, input_columns)
+        # Metadata errors take microseconds to find: don't hash data first
+        form.check_metadata(input_columns)
     except GentleValueError as err:
-        return (
-            table,
-            err.i18n_message,
-            {
-                "error": "Please correct the error in this step's data or parameters"
-            },  # TODO_i18n
+        return err.i18n_message, _error_json(output_format)
+
+    if arrow_data_path is not None:
+        message, json_dict = _render_with_arrow_data(
+            form, make_chart, fingerprint(), arrow_data_path, spec_options
         )
+        if output_format == "dict":
+            return message, json_dict
+        json_bytes = json.dumps(json_dict).encode("utf-8")
+        if output_format == "json-chunks":
+            return message, iter([json_bytes])
+        return message, json_bytes
+
+    if output_format == "json-chunks":
+        try:
+            chart = _make_chart_stage(make_chart)
+        except GentleValueError as err:
+            return err.i18n_message, _error_json(output_format)
+        chart = chart._replace(temporal_encoding=temporal_encoding, **spec_options)
+        return "", chart.to_vega_json_chunks()
+
+    data_fingerprint = fingerprint()
+    cache_key = (
+        form._replace(y_columns=tuple(form.y_columns)),
+        temporal_encoding,
+        output_format,
+        tuple(spec_options.items()),
+        data_fingerprint,
+    )
+    cached = render_cache.get(cache_key)
+    if cached is not None:
+        message, value = cached
+        if message:
+            return message, _error_json(output_format)
+        elif output_format == "dict":
+            chart, vega_data = value
+            return "", chart.to_vega(data=_copy_vega_data(vega_data))
+        return cached  # JSON bytes: immutable
+
+    data_key = (form.without_presentation(), temporal_encoding, data_fingerprint)
+    cached_data = chart_data_cache.get(data_key)
+    if cached_data is not None:
+        chart, vega_data = cached_data
+        chart = form.restyle_chart(chart)._replace(**spec_options)
+    else:
+        try:
+            chart = _make_chart_stage(make_chart)
+        except GentleValueError as err:
+            render_cache.put(cache_key, (err.i18n_message, None), 1_000)
+            return err.i18n_message, _error_json(output_format)
+
+        chart = chart._replace(temporal_encoding=temporal_encoding, **spec_options)
+        if output_format == "json-bytes":
+            vega_data = None  # we'll stream it; don't build records
+        else:
+            vega_data = chart.to_vega_data()
+            chart_data_cache.put(
+                data_key,
+                (chart, vega_data),
+                _estimate_nbytes({"data": vega_data}) + _chart_series_nbytes(chart),
+            )
 
-    json_dict = chart.to_vega()
-    return (table, "", json_dict)
+    if output_format == "json-bytes":
+        if vega_data is None:
+            with _stage("to_vega_json_chunks") as info:
+                json_bytes = _join_chunks(chart.to_vega_json_chunks())
+                info["nbytes"] = len(json_bytes)
+        else:
+            json_dict = chart.to_vega(data=vega_data)
+            with _stage("json_dumps") as info:
+                json_bytes = json.dumps(json_dict).encode("utf-8")
+                info["nbytes"] = len(json_bytes)
+        render_cache.put(cache_key, ("", json_bytes), len(json_bytes))
+        return "", json_bytes
+
+    # Cache the chart and data, not the spec: each caller gets its own copy
+    render_cache.put(
+        cache_key, ("", (chart, vega_data)), _estimate_nbytes({"data": vega_data})
+    )
+    return "", chart.to_vega(data=_copy_vega_data(vega_data))
+
+
+def render(
+    table,
+    params,
+    *,
+    input_columns,
+    temporal_encoding="iso8601",
+    output_format="dict",
+    arrow_data_path=None,
+    series_layout="layers",
+    theme="inline",
+    on_stage=None,
+):
+    """Render a Vega-Lite spec.
+
+    Pass `temporal_encoding="epoch-ms"` to send date and timestamp X values
+    as int milliseconds instead of ISO8601 strings: smaller and faster to
+    parse, for clients that can handle it.
+
+    `output_format` selects the type of the returned spec:
+
+        * "dict": a JSON-compatible dict (the default).
+        * "json-bytes": UTF-8 JSON, exactly `json.dumps()` of the dict. The
+          data is formatted straight from column buffers, so the dict never
+          exists and the host need not serialize it.
+        * "json-chunks": an iterator of UTF-8 JSON bytes, which concatenate
+          to "json-bytes". Peak memory is about one chunk. Never cached.
+
+    Pass `arrow_data_path` (a `pathlib.Path`) to write chart data to that
+    file in Arrow IPC stream format, instead of inlining it in the spec. The
+    spec's data URL is then the ARROW_DATA_URL placeholder, which the client
+    replaces with the URL it serves the file from. Temporal X values are
+    always epoch-ms in this mode. On error, we write no file.
+
+    Pass `series_layout="fold"` to draw all Y series with one line layer and
+    one hover-point layer, after a Vega-Lite "fold" transform. The default,
+    "layers", adds two layers per series, which clients evaluate separately:
+    with many series, "fold" makes a smaller spec that renders faster. The
+    chart looks the same.
+
+    Pass `theme="client"` to leave THEME out of the spec's config, for
+    clients that apply it themselves (like linechart.html). The config then
+    only holds what differs per chart, and "usermeta" names THEME_VERSION.
+
+    Pass `on_stage` (a callable) to receive a StageMetrics for each pipeline
+    stage, as it finishes: "make_chart" (and the stages nested in it),
+    "to_vega_data", "to_vega", serialization, and finally "render", which
+    spans the whole call. Cache hits skip stages. With "json-chunks", the
+    "to_vega_json_chunks" stage is reported after "render", once the host
+    has consumed the iterator.
+
+    Results are cached in `render_cache`. When only presentation params
+    changed, data is reused from `chart_data_cache`.
+    """
+    form = Form.from_params(**params)
+    return (
+        table,
+        *_render_form(
+            form,
+            input_columns,
+            lambda: form.make_chart(table, input_columns),
+            lambda: _fingerprint_columns(table, form.column_names, input_columns),
+            temporal_encoding=temporal_encoding,
+            output_format=output_format,
+            arrow_data_path=arrow_data_path,
+            series_layout=series_layout,
+            theme=theme,
+            on_stage=on_stage,
+        ),
+    )
+
+
+def validate(params, input_columns):
+    """Find errors in params and column metadata, without any table data.
+
+    Return the error `render()` would return -- or "" if `render()` may
+    succeed. Hosts can call this to reject a misconfigured step without
+    loading its input table.
+    """
+    form = Form.from_params(**params)
+    try:
+        form.check_metadata(input_columns)
+    except GentleValueError as err:
+        return err.i18n_message
+    return ""
+
+
+def required_columns(params) -> List[str]:
+    """List the input columns `render()` reads, given (possibly old) params.
+
+    Hosts can load just these columns -- X first, then Y, without duplicates
+    or unset (empty) names -- and pass the projected table to
+    `render_projected()` or `render_arrow()`.
+    """
+    form = Form.from_params(**migrate_params(params))
+    return [name for name in dict.fromkeys(form.column_names) if name]
+
+
+def render_projected(projected_table, params, *, input_columns, **kwargs):
+    """Render a spec from a table of only `required_columns(params)`.
+
+    The host keeps its full table as this step's output, so we return just
+    (error, spec). Options are the same as `render()`'s.
+    """
+    _, error, spec = render(
+        projected_table, params, input_columns=input_columns, **kwargs
+    )
+    return error, spec
+
+
+def render_arrow(
+    arrow_table,
+    params,
+    *,
+    input_columns,
+    temporal_encoding="iso8601",
+    output_format="dict",
+    arrow_data_path=None,
+    series_layout="layers",
+    theme="inline",
+    on_stage=None,
+):
+    """Render a Vega-Lite spec from a pyarrow.Table.
+
+    This is `render()` without the Arrow=>pandas conversion of the whole
+    table. We only read the X and Y columns; null masks and validation
+    operate on Arrow arrays, and no DataFrame is ever built. Options and
+    return value are the same as `render()`'s.
+    """
+    form = Form.from_params(**params)
+    return (
+        arrow_table,
+        *_render_form(
+            form,
+            input_columns,
+            lambda: form.make_chart_from_arrow(arrow_table, input_columns),
+            lambda: _fingerprint_arrow_columns(
+                arrow_table, form.column_names, input_columns
+            ),
+            temporal_encoding=temporal_encoding,
+            output_format=output_format,
+            arrow_data_path=arrow_data_path,
+            series_layout=series_layout,
+            theme=theme,
+            on_stage=on_stage,
+        ),
+    )
+
+
+def render_arrow_file(
+    path,
+    params,
+    *,
+    input_columns,
+    temporal_encoding="iso8601",
+    output_format="dict",
+    arrow_data_path=None,
+    series_layout="layers",
+    theme="inline",
+    on_stage=None,
+):
+    """Render a Vega-Lite spec from an Arrow IPC file (a.k.a. Feather v2).
+
+    The file is memory-mapped and read one record batch at a time (see
+    `Form.make_chart_from_arrow_file()`), so peak memory scales with the
+    chart's output size, not the table's row count. Set "max_points" with
+    "downsample": "m4" to bound it. (LTTB reads every row: its output depends
+    on neighboring rows, so it can't be computed batch by batch.) Use
+    `output_format="json-chunks"` to stream JSON rows from the chart instead
+    of building the whole spec in memory.
+
+    Options are the same as `render()`'s. Return value is (path, error,
+    spec). Cache hits require the same path, size and mtime -- and don't open
+    the file at all.
+    """
+    form = Form.from_params(**params)
+
+    def make_chart() -> Chart:
+        with pa.memory_map(os.fspath(path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            return form.make_chart_from_arrow_file(reader, input_columns)
+
+    return (
+        path,
+        *_render_form(
+            form,
+            input_columns,
+            make_chart,
+            lambda: _fingerprint_file(path, form.column_names, input_columns),
+            temporal_encoding=temporal_encoding,
+            output_format=output_format,
+            arrow_data_path=arrow_data_path,
+            series_layout=series_layout,
+            theme=theme,
+            on_stage=on_stage,
+        ),
+    )
+
+
+PEAK_MEMORY_MULTIPLES = {"json-chunks": 2.0, "json-bytes": 6.0, "dict": 14.0}
+"""Most memory `render()` allocates at once, as a multiple of its input.
+
+"Input" is the bytes of the X and Y columns. Limits hold for number and
+timestamp columns of 100k+ rows, measured by `audit_render_memory()`. They
+include the returned spec -- which, for "dict", is a Python object per value,
+and the render caches keep their own copy of those values.
+"""
+
+
+class StageMemory(NamedTuple):
+    name: str
+    peak_nbytes: int
+    """Most bytes allocated at once during the stage, above its start."""
+    retained_nbytes: int
+    """Bytes still allocated when the stage ended, above its start."""
+
+
+class MemoryReport(NamedTuple):
+    input_nbytes: int
+    """Bytes of the X and Y columns `render()` read."""
+    peak_nbytes: int
+    """Most bytes allocated at once during `render()`."""
+    stages: List[StageMemory]
+    """Stages in the order they started (nested stages follow their parent)."""
+
+    @property
+    def peak_multiple(self) -> float:
+        return self.peak_nbytes / max(self.input_nbytes, 1)
+
+
+class _MemoryAudit:
+    """Stage observer that measures allocations with tracemalloc."""
+
+    def __init__(self):
+        self.base_nbytes = tracemalloc.get_traced_memory()[0]
+        self.peak_nbytes = self.base_nbytes
+        self.stages: List[Optional[StageMemory]] = []
+        self._open: List[List[int]] = []  # [index, start_nbytes, peak_nbytes]
+
+    def _fold_peak(self) -> int:
+        """Fold tracemalloc's peak into all open stages; reset it.
+
+        Python 3.8 has no `tracemalloc.reset_peak()`: there, the peak is the
+        most allocated since tracing started, so a stage's peak may include
+        an earlier stage's.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self.peak_nbytes = max(self.peak_nbytes, peak)
+        for frame in self._open:
+            frame[2] = max(frame[2], peak)
+        if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+
+            tracemalloc.reset_peak()
+        return current
+
+    def stage_started(self, name: str) -> None:
+        current = self._fold_peak()
+        self._open.append([len(self.stages), current, current])
+        self.stages.append(None)  # placeholder, so stages stay in start order
+
+    def stage_finished(self, name: str, info: Dict[str, Any]) -> None:
+        current = self._fold_peak()
+        index, start, peak = self._open.pop()
+        self.stages[index] = StageMemory(name, peak - start, current - start)
+
+    def finish(self) -> int:
+        """Return peak bytes allocated since we started."""
+        self._fold_peak()
+        return self.peak_nbytes - self.base_nbytes
+
+
+def audit_render_memory(table, params, *, input_columns, **kwargs) -> MemoryReport:
+    """Call `render()` under tracemalloc; report allocations per stage.
+
+    This is a diagnostic mode. It swaps in empty caches while it runs (so
+    every stage runs), and it is not thread-safe. "json-chunks" output is
+    consumed (and discarded) as a "to_vega_json_chunks" stage.
+
+    On Python 3.8, the overall peak is exact if tracemalloc was not already
+    tracing, but each stage's `peak_nbytes` is only an upper bound: it may
+    include peaks of stages that ran before it. (Python 3.9+ has
+    `tracemalloc.reset_peak()`, so every peak is exact.)
+
+    `PEAK_MEMORY_MULTIPLES` lists the limits we promise.
+    """
+    global render_cache, chart_data_cache
+
+    form = Form.from_params(**params)
+    input_nbytes = sum(
+        int(table[name].memory_usage(index=False, deep=True))
+        for name in dict.fromkeys(form.column_names)
+        if name in table
+    )
+
+    saved_caches = render_cache, chart_data_cache
+    render_cache, chart_data_cache = RenderCache(), RenderCache()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    audit = _MemoryAudit()
+    try:
+        with _observing(audit):
+            _, _, spec = render(table, params, input_columns=input_columns, **kwargs)
+            if kwargs.get("output_format") == "json-chunks":
+                with _stage("to_vega_json_chunks"):
+                    for _ in spec:
+                        pass
+        peak_nbytes = audit.finish()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+        render_cache, chart_data_cache = saved_caches
+    return MemoryReport(input_nbytes, peak_nbytes, audit.stages)
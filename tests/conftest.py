@@ -0,0 +1,31 @@
+import pytest
+
+import linechart
+from linechart import RenderCache
+
+
+def P(x_column="A", y_columns=["B"], **kwargs):
+    """Build render() params: one color per Y column, empty labels."""
+    return {
+        "title": "",
+        "x_axis_label": "",
+        "y_axis_label": "",
+        "x_column": x_column,
+        "y_columns": [{"column": c, "color": "#123456"} for c in y_columns],
+        **kwargs,
+    }
+
+
+@pytest.fixture(autouse=True)
+def empty_render_cache(monkeypatch):
+    """Give every test its own render() cache, so no result leaks between tests."""
+    cache = RenderCache()
+    monkeypatch.setattr(linechart, "render_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def empty_chart_data_cache(monkeypatch):
+    cache = RenderCache()
+    monkeypatch.setattr(linechart, "chart_data_cache", cache)
+    return cache
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+import linechart
+from linechart import ColumnProfile
+
+
+def test_number():
+    profile = ColumnProfile.from_values(pd.Series([1.0, 3.0, 2.0]), "number", 2)
+    assert profile == ColumnProfile(2, 3, 1.0, 3.0, True, False)
+
+
+def test_number_one_distinct_value():
+    profile = ColumnProfile.from_values(pd.Series([4, 4, 4]), "number", 0)
+    assert profile.has_two_distinct is False
+    assert profile.is_monotonic_increasing is True
+
+
+def test_empty():
+    profile = ColumnProfile.from_values(pd.Series([], dtype=float), "number", 3)
+    assert profile == ColumnProfile(3, 0, None, None, False, False)
+
+
+def test_timestamp_units_are_ns():
+    profile = ColumnProfile.from_values(
+        pd.Series(["1970-01-01T00:00:01", "1970-01-02"], dtype="datetime64[ns]"),
+        "timestamp",
+        0,
+    )
+    assert profile.min == 1_000_000_000
+    assert profile.max == 86_400_000_000_000
+    assert profile.is_monotonic_increasing is True
+
+
+def test_date_units_are_days():
+    profile = ColumnProfile.from_values(
+        pd.Series(["1970-01-03", "1970-01-02"], dtype="period[D]"), "date", 0
+    )
+    assert (profile.min, profile.max) == (1, 2)
+    assert profile.is_monotonic_increasing is False
+
+
+def test_text():
+    assert ColumnProfile.from_values(
+        pd.Series(["a", "a", "b"]), "text", 0
+    ) == ColumnProfile(0, 3, None, None, True, False)
+    assert (
+        ColumnProfile.from_values(pd.Series(["a", "a"]), "text", 0).has_two_distinct
+        is False
+    )
+
+
+def test_text_categorical():
+    assert ColumnProfile.from_values(
+        pd.Series(["a", "a", "b"], dtype="category"), "text", 0
+    ).has_two_distinct
+
+
+def test_monotonic_across_chunks(monkeypatch):
+    monkeypatch.setattr(linechart, "_CHUNK_SIZE", 4)
+    values = np.arange(10.0)
+    assert ColumnProfile.from_values(
+        pd.Series(values), "number", 0
+    ).is_monotonic_increasing
+    values[4] = 2.5  # decrease exactly at a chunk boundary
+    assert not ColumnProfile.from_values(
+        pd.Series(values), "number", 0
+    ).is_monotonic_increasing
+
+
+def test_two_distinct_in_last_chunk(monkeypatch):
+    monkeypatch.setattr(linechart, "_CHUNK_SIZE", 4)
+    values = ["a"] * 9 + ["b"]
+    assert ColumnProfile.from_values(pd.Series(values), "text", 0).has_two_distinct
@@ -0,0 +1,192 @@
+import datetime
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from linechart import Form, YColumn, _lttb_indices, _m4_indices
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+
+def test_lttb_keeps_first_and_last():
+    x = np.arange(100, dtype=np.float64)
+    y = np.sin(x)
+    picks = _lttb_indices(x, y, 10)
+    assert len(picks) == 10
+    assert picks[0] == 0
+    assert picks[-1] == 99
+    assert np.all(np.diff(picks) > 0)
+
+
+def test_lttb_picks_spike():
+    x = np.arange(100, dtype=np.float64)
+    y = np.zeros(100)
+    y[42] = 100.0
+    assert 42 in _lttb_indices(x, y, 5)
+
+
+def test_lttb_no_op_when_under_budget():
+    x = np.arange(5, dtype=np.float64)
+    assert np.array_equal(_lttb_indices(x, x, 10), np.arange(5))
+
+
+def test_lttb_tiny_budget():
+    x = np.arange(5, dtype=np.float64)
+    assert np.array_equal(_lttb_indices(x, x, 2), [0, 4])
+
+
+def test_m4_keeps_first_last_min_max_per_bin():
+    x = np.arange(8, dtype=np.float64)
+    y = np.array([5.0, 9.0, 1.0, 6.0, 3.0, 2.0, 8.0, 4.0])
+    # bins: [0..3], [4..7]
+    assert np.array_equal(_m4_indices(x, y, 2), [0, 1, 2, 3, 4, 5, 6, 7])
+    y = np.array([5.0, 9.0, 1.0, 6.0, 7.0, 3.0, 2.0, 8.0, 4.0, 0.0])
+    x = np.arange(10, dtype=np.float64)
+    # bins: [0..4], [5..9]
+    assert np.array_equal(_m4_indices(x, y, 2), [0, 1, 2, 4, 5, 7, 9])
+
+
+def test_m4_keeps_every_spike():
+    x = np.arange(10000, dtype=np.float64)
+    y = np.zeros(10000)
+    spikes = [17, 3333, 5000, 9998]
+    y[spikes] = [100.0, -100.0, 50.0, 75.0]
+    picks = _m4_indices(x, y, 10)
+    assert len(picks) <= 40
+    assert set(spikes) <= set(picks)
+
+
+def test_m4_picks_per_bin_even_when_under_budget():
+    # `_downsample()` skips small series; M4 itself is the same at any size
+    x = np.arange(8, dtype=np.float64)
+    assert np.array_equal(_m4_indices(x, x, 2), [0, 3, 4, 7])
+
+
+def test_m4_bins_on_given_domain():
+    x = np.array([4.0, 5.0, 6.0, 7.0])
+    y = np.array([1.0, 3.0, 2.0, 4.0])
+    # domain [0, 8): bins [0..4), [4..8) -- all of x is in bin 1
+    assert np.array_equal(_m4_indices(x, y, 2, 0.0, 8.0), [0, 3])
+    assert np.array_equal(_m4_indices(x, y, 2), [0, 1, 2, 3])
+
+
+def test_m4_uneven_x():
+    x = np.array([0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 10.0])
+    y = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 5.0, 3.0])
+    # bin 0 has x in [0, 5); bin 1 has only x=10
+    assert np.array_equal(_m4_indices(x, y, 2), [0, 1, 5, 8, 9])
+
+
+def test_form_max_points_zero_keeps_all():
+    form = Form("", "", "", "A", [YColumn("B", "#123456")], max_points=0)
+    table = pd.DataFrame({"A": range(1000), "B": np.arange(1000) % 7})
+    chart = form.make_chart(
+        table, {"A": Column("A", "number", "{:}"), "B": Column("B", "number", "{:}")}
+    )
+    assert len(chart.x_series.series) == 1000
+
+
+def test_form_max_points_downsamples():
+    form = Form("", "", "", "A", [YColumn("B", "#123456")], max_points=50)
+    table = pd.DataFrame({"A": range(1000), "B": np.arange(1000) % 7})
+    chart = form.make_chart(
+        table, {"A": Column("A", "number", "{:}"), "B": Column("B", "number", "{:}")}
+    )
+    assert len(chart.x_series.series) == 50
+    assert len(chart.y_serieses[0].series) == 50
+    assert chart.x_series.series.iloc[0] == 0
+    assert chart.x_series.series.iloc[-1] == 999
+    # rows stay aligned
+    assert np.array_equal(chart.y_serieses[0].series, chart.x_series.series % 7)
+
+
+def test_form_max_points_unsorted_x_keeps_min_and_max():
+    form = Form("", "", "", "A", [YColumn("B", "#123456")], max_points=10)
+    rng = np.random.default_rng(0)
+    a = rng.permutation(1000)
+    table = pd.DataFrame({"A": a, "B": a * 2.0})
+    chart = form.make_chart(
+        table, {"A": Column("A", "number", "{:}"), "B": Column("B", "number", "{:}")}
+    )
+    assert chart.x_series.series.min() == 0
+    assert chart.x_series.series.max() == 999
+    assert np.array_equal(chart.y_serieses[0].series, chart.x_series.series * 2.0)
+
+
+def test_form_max_points_union_of_series_ignores_nulls():
+    form = Form(
+        "",
+        "",
+        "",
+        "A",
+        [YColumn("B", "#123456"), YColumn("C", "#234567")],
+        max_points=10,
+    )
+    b = np.arange(1000, dtype=np.float64)
+    b[500:] = np.nan
+    c = np.arange(1000, dtype=np.float64)
+    c[:500] = np.nan
+    table = pd.DataFrame({"A": range(1000), "B": b, "C": c})
+    chart = form.make_chart(table, {k: Column(k, "number", "{:}") for k in "ABC"})
+    assert chart.y_serieses[0].series.count() == 10
+    assert chart.y_serieses[1].series.count() == 10
+
+
+def test_form_max_points_timestamp_ticks_line_up():
+    form = Form("", "", "", "A", [YColumn("B", "#123456")], max_points=20)
+    dates = pd.date_range("2000-01-01", periods=500, freq="MS")
+    table = pd.DataFrame({"A": dates, "B": np.arange(500.0) % 13})
+    columns = {"A": Column("A", "timestamp", None), "B": Column("B", "number", "{:}")}
+    full = Form("", "", "", "A", [YColumn("B", "#123456")]).make_chart(table, columns)
+    chart = form.make_chart(table, columns)
+    assert len(chart.x_series.series) < 500
+    assert (
+        chart.x_series.timestamp_tick_values_and_format
+        == full.x_series.timestamp_tick_values_and_format
+    )
+    assert chart.x_series.timestamp_tick_values_and_format[0][-1] == datetime.date(
+        2041, 8, 1
+    )
+
+
+def test_form_max_points_date():
+    form = Form("", "", "", "A", [YColumn("B", "#123456")], max_points=10)
+    table = pd.DataFrame(
+        {
+            "A": pd.period_range("2000-01-01", periods=100, freq="D"),
+            "B": np.arange(100.0),
+        }
+    )
+    chart = form.make_chart(
+        table, {"A": Column("A", "date", "day"), "B": Column("B", "number", "{:}")}
+    )
+    assert len(chart.x_series.series) == 10
+    assert chart.x_series.json_compatible_values.iloc[-1] == "2000-04-09"
+
+
+def test_form_max_points_text_x_not_downsampled():
+    form = Form("", "", "", "A", [YColumn("B", "#123456")], max_points=3)
+    table = pd.DataFrame({"A": list("abcdefgh"), "B": np.arange(8.0)})
+    chart = form.make_chart(
+        table, {"A": Column("A", "text", None), "B": Column("B", "number", "{:}")}
+    )
+    assert len(chart.x_series.series) == 8
+
+
+def test_form_m4_keeps_spikes_lttb_would_drop():
+    x = np.arange(100000)
+    y = np.zeros(100000)
+    y[12345] = 1000.0
+    y[12346] = -1000.0
+    table = pd.DataFrame({"A": x, "B": y})
+    columns = {"A": Column("A", "number", "{:}"), "B": Column("B", "number", "{:}")}
+    form = Form(
+        "", "", "", "A", [YColumn("B", "#123456")], max_points=400, downsample="m4"
+    )
+    chart = form.make_chart(table, columns)
+    assert len(chart.x_series.series) <= 400
+    assert chart.y_serieses[0].series.max() == 1000.0
+    assert chart.y_serieses[0].series.min() == -1000.0
+    assert chart.x_series.series.iloc[0] == 0
+    assert chart.x_series.series.iloc[-1] == 99999
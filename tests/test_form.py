@@ -6,7 +6,7 @@ import pandas as pd
 import pytest
 from cjwmodule.testing.i18n import i18n_message
 
-from linechart import Form, GentleValueError, YColumn
+from linechart import THEME, Form, GentleValueError, YColumn
 
 Column = namedtuple("Column", ("name", "type", "format"))
 
@@ -227,6 +227,62 @@ def test_x_timestamp_custom_ticks():
     ]
 
 
+def test_x_label_metrics_text():
+    form = build_form(x_column="A")
+    short = form.make_chart(
+        pd.DataFrame({"A": ["a", "b", "a"], "B": [1, 2, 3]}),
+        {"A": Column("A", "text", None), "B": Column("B", "number", "{:}")},
+    )
+    long = form.make_chart(
+        pd.DataFrame({"A": ["a long label", "another long label"], "B": [1, 2]}),
+        {"A": Column("A", "text", None), "B": Column("B", "number", "{:}")},
+    )
+    assert short.to_vega()["usermeta"] == {
+        "xAxisLabels": short.to_vega_x_label_metrics()
+    }
+    # two distinct labels, each a step wide
+    assert 2 * 6 < short.to_vega_x_label_metrics()["minPlotWidth"] < 2 * 12
+    assert long.to_vega_x_label_metrics()["minPlotWidth"] > 150
+
+
+def test_x_label_metrics_text_east_asian_wide():
+    form = build_form(x_column="A")
+    columns = {"A": Column("A", "text", None), "B": Column("B", "number", "{:}")}
+    latin = form.make_chart(pd.DataFrame({"A": ["abcd", "efgh"], "B": [1, 2]}), columns)
+    cjk = form.make_chart(
+        pd.DataFrame({"A": ["東京都庁", "ｆｕｌｌ"], "B": [1, 2]}), columns
+    )
+    # 4 wide characters are about 4em: nearly twice as wide as "abcd"
+    assert (
+        cjk.to_vega_x_label_metrics()["minPlotWidth"]
+        > 1.7 * latin.to_vega_x_label_metrics()["minPlotWidth"]
+    )
+
+
+def test_x_label_metrics_timestamp_custom_ticks():
+    form = build_form(x_column="A")
+    chart = form.make_chart(
+        pd.DataFrame(
+            {
+                "A": [datetime.datetime(2020, m, 1) for m in (1, 4, 7, 10)],
+                "B": [1, 2, 3, 4],
+            }
+        ),
+        {"A": Column("A", "timestamp", None), "B": Column("B", "number", "{:}")},
+    )
+    assert chart.to_vega_x_encoding()["axis"]["labelExpr"] == (
+        'utcFormat(datum.value, "Q%q %Y")'
+    )
+    # 4 labels like "Q1 2020": 3 steps, each about one label wide
+    assert 3 * 40 < chart.to_vega_x_label_metrics()["minPlotWidth"] < 3 * 60
+
+
+def test_x_label_metrics_none_when_vega_picks_ticks():
+    chart = build_form().make_chart(min_table, min_columns)
+    assert chart.to_vega_x_label_metrics() is None
+    assert "usermeta" not in chart.to_vega()
+
+
 def test_x_timestamp_drop_na_x():
     form = build_form(x_column="A")
     t1 = datetime.datetime(2018, 8, 29, 13, 39)
@@ -343,3 +399,216 @@ def test_y_axis_empty_label_when_multiple_series():
     )
     vega = chart.to_vega()
     assert vega["encoding"]["y"] == {"title": ""}
+
+
+def test_inline_data_native_types():
+    form = build_form(
+        x_column="A", y_columns=[YColumn("B", "#123456"), YColumn("C", "#234567")]
+    )
+    table = pd.DataFrame(
+        {"A": ["a", "b"], "B": [1, 2], "C": [np.nan, 2.5]},
+    )
+    chart = form.make_chart(
+        table,
+        {
+            "A": Column("A", "text", None),
+            "B": Column("B", "number", "{:}"),
+            "C": Column("C", "number", "{:}"),
+        },
+    )
+    values = chart.to_vega_inline_data()
+    assert values == [{"x": "a", "y0": 1, "y1": None}, {"x": "b", "y0": 2, "y1": 2.5}]
+    assert type(values[0]["y0"]) is int
+    assert type(values[1]["y1"]) is float
+
+
+def test_x_timestamp_epoch_ms():
+    form = build_form(x_column="A")
+    t1 = datetime.datetime(2018, 8, 29, 13, 39)
+    t2 = datetime.datetime(1969, 12, 31, 23, 59, 59, 999999)
+    table = pd.DataFrame({"A": [t1, t2], "B": [3, 4]})
+    chart = form.make_chart(
+        table,
+        {"A": Column("A", "timestamp", None), "B": Column("B", "number", "{:}")},
+    )._replace(temporal_encoding="epoch-ms")
+    vega = chart.to_vega()
+    assert vega["encoding"]["x"]["type"] == "temporal"
+    assert vega["data"]["values"] == [
+        {"x": 1535549940000, "y0": 3},
+        {"x": -1, "y0": 4},
+    ]
+
+
+def test_x_timestamp_custom_ticks_epoch_ms():
+    form = build_form(x_column="A")
+    t1 = datetime.datetime(2020, 12, 7)
+    t2 = datetime.datetime(2020, 12, 14)
+    table = pd.DataFrame({"A": [t1, t2], "B": [3, 4]})
+    chart = form.make_chart(
+        table,
+        {"A": Column("A", "timestamp", None), "B": Column("B", "number", "{:}")},
+    )._replace(temporal_encoding="epoch-ms")
+    vega = chart.to_vega()
+    assert vega["encoding"]["x"]["scale"]["domainMin"] == 1607299200000
+    assert vega["encoding"]["x"]["axis"]["values"] == [1607299200000, 1607904000000]
+    assert vega["data"]["values"] == [
+        {"x": 1607299200000, "y0": 3},
+        {"x": 1607904000000, "y0": 4},
+    ]
+    assert vega["encoding"]["tooltip"][0] == {
+        "field": "x",
+        "type": "temporal",
+        "scale": {"type": "utc"},
+        "format": "%b %-d, %Y",
+    }
+
+
+def test_x_date_epoch_ms():
+    form = build_form(x_column="A")
+    table = pd.DataFrame(
+        {"A": pd.Series(["2020-12-07", "2020-12-14"], dtype="period[D]"), "B": [3, 4]}
+    )
+    chart = form.make_chart(
+        table,
+        {"A": Column("A", "date", "week"), "B": Column("B", "number", "{:}")},
+    )._replace(temporal_encoding="epoch-ms")
+    vega = chart.to_vega()
+    assert vega["encoding"]["x"]["timeUnit"] == "utcyearmonthdate"
+    assert vega["data"]["values"] == [
+        {"x": 1607299200000, "y0": 3},
+        {"x": 1607904000000, "y0": 4},
+    ]
+
+
+def test_x_number_ignores_epoch_ms():
+    form = build_form(x_column="A")
+    chart = form.make_chart(min_table, min_columns)._replace(
+        temporal_encoding="epoch-ms"
+    )
+    assert chart.to_vega()["data"]["values"] == [
+        {"x": 1, "y0": 3},
+        {"x": 2, "y0": 4},
+    ]
+
+
+def test_x_profile():
+    form = build_form(x_column="A")
+    table = pd.DataFrame({"A": [1, np.nan, 3, 2], "B": [3, 4, 5, 6]})
+    chart = form.make_chart(
+        table,
+        {"A": Column("A", "number", "{:}"), "B": Column("B", "number", "{:}")},
+    )
+    profile = chart.x_series.profile
+    assert (profile.null_count, profile.non_null_count) == (1, 3)
+    assert (profile.min, profile.max) == (1, 3)
+    assert profile.is_monotonic_increasing is False
+
+
+def test_y_block_masking_mixed_dtypes():
+    form = build_form(
+        x_column="A",
+        y_columns=[
+            YColumn("B", "#123456"),
+            YColumn("C", "#234567"),
+            YColumn("D", "#345678"),
+            YColumn("E", "#456789"),
+        ],
+    )
+    table = pd.DataFrame(
+        {
+            "A": [1, np.nan, 3, 4],
+            "B": [1.0, 2.0, np.nan, 4.0],
+            "C": [5, 6, 7, 8],
+            "D": [np.nan, 10.0, 11.0, 12.0],
+            "E": pd.Series([13, 14, None, 16], dtype="Int64"),
+        }
+    )
+    chart = form.make_chart(table, {k: Column(k, "number", "{:}") for k in "ABCDE"})
+    assert [y.name for y in chart.y_serieses] == ["B", "C", "D", "E"]
+    assert chart.to_vega_inline_data() == [
+        {"x": 1.0, "y0": 1.0, "y1": 5, "y2": None, "y3": 13},
+        {"x": 3.0, "y0": None, "y1": 7, "y2": 11.0, "y3": None},
+        {"x": 4.0, "y0": 4.0, "y1": 8, "y2": 12.0, "y3": 16},
+    ]
+    # Float columns are views of one block
+    b = chart.y_serieses[0].series.to_numpy()
+    d = chart.y_serieses[2].series.to_numpy()
+    assert b.base is not None and b.base is d.base
+
+
+def test_y_no_x_nulls_does_not_copy():
+    form = build_form(x_column="A")
+    table = pd.DataFrame({"A": [1.0, 2.0, 3.0], "B": [4.0, np.nan, 6.0]})
+    chart = form.make_chart(table, min_columns)
+    assert np.shares_memory(
+        chart.y_serieses[0].series.to_numpy(), table["B"].to_numpy()
+    )
+
+
+def test_y_block_masking_empty_after_mask():
+    form = build_form(x_column="A", y_columns=[YColumn("B", "#123456")])
+    table = pd.DataFrame({"A": [1, 2, np.nan], "B": [np.nan, np.nan, 3.0]})
+    with pytest.raises(GentleValueError) as excinfo:
+        form.make_chart(table, min_columns)
+    assert excinfo.value.i18n_message == i18n_message(
+        "emptyAxisError.message", {"column_name": "B"}
+    )
+
+
+def test_metadata_errors_before_data_errors():
+    # X has only one value, but we needn't read data to know Y is text
+    form = build_form(y_columns=[YColumn("B", "#123456")])
+    table = pd.DataFrame({"A": [1, 1], "B": ["a", "b"]})
+    with pytest.raises(GentleValueError) as excinfo:
+        form.make_chart(
+            table,
+            {"A": Column("A", "number", "{:}"), "B": Column("B", "text", None)},
+        )
+    assert excinfo.value.i18n_message == i18n_message(
+        "axisNotNumericError.message", {"column_name": "B"}
+    )
+
+
+def test_no_y_columns_before_x_data_errors():
+    form = build_form(y_columns=[])
+    table = pd.DataFrame({"A": [np.nan, np.nan], "B": [1, 2]})
+    with pytest.raises(GentleValueError) as excinfo:
+        form.make_chart(table, min_columns)
+    assert excinfo.value.i18n_message == i18n_message("noYAxisError.message")
+
+
+def test_charts_of_same_shape_get_their_own_colors_and_titles():
+    chart1 = build_form(title="One").make_chart(min_table, min_columns)
+    chart2 = build_form(title="Two", y_columns=[YColumn("B", "#654321")]).make_chart(
+        pd.DataFrame({"A": [5, 6, 7], "B": [1, 2, 3]}), min_columns
+    )
+    vega1 = chart1.to_vega()
+    vega2 = chart2.to_vega()
+    assert vega1["config"] == vega2["config"]
+    assert vega1["title"] == "One"
+    assert vega2["title"] == "Two"
+    assert vega1["layer"][2]["mark"]["fill"] == "#123456"
+    assert vega2["layer"][2]["mark"]["fill"] == "#654321"
+    assert vega1["layer"][1] == vega2["layer"][1]  # the rule
+
+    integers = build_form().make_chart(
+        min_table, {**min_columns, "B": Column("B", "number", "{:,d}")}
+    )
+    assert integers.to_vega()["config"]["axisY"]["tickMinStep"] == 1
+    assert "tickMinStep" not in vega1["config"]["axisY"]
+
+
+def test_modifying_a_spec_leaves_theme_and_other_specs_alone():
+    chart = build_form().make_chart(min_table, min_columns)
+    vega1 = chart.to_vega()
+    vega1["config"]["title"]["color"] = "#ff0000"
+    vega1["config"]["axisY"]["tickCount"]["expr"] = "1"
+    vega1["layer"][0]["mark"]["point"]["size"] = 1
+    vega1["layer"][1]["mark"]["color"] = "#ff0000"
+    assert THEME["title"]["color"] != "#ff0000"
+    assert THEME["axisY"]["tickCount"]["expr"] != "1"
+    vega2 = chart.to_vega()
+    assert vega2["config"]["title"]["color"] == THEME["title"]["color"]
+    assert vega2["config"]["axisY"]["tickCount"] == THEME["axisY"]["tickCount"]
+    assert vega2["layer"][0]["mark"]["point"]["size"] == 36
+    assert vega2["layer"][1]["mark"]["color"] != "#ff0000"
@@ -0,0 +1,89 @@
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from linechart import PEAK_MEMORY_MULTIPLES, audit_render_memory
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+N_ROWS = 100_000
+N_SERIES = 4
+
+
+def build_table(x_type, null_density=0.1):
+    rng = np.random.default_rng(0)
+    if x_type == "number":
+        x = pd.Series(np.arange(N_ROWS, dtype=np.float64))
+    else:
+        x = pd.Series((np.arange(N_ROWS) * 3_600_000_000_000).view("datetime64[ns]"))
+    x[rng.random(N_ROWS) < null_density] = None
+    data = {"X": x}
+    for i in range(N_SERIES):
+        y = rng.standard_normal(N_ROWS)
+        y[rng.random(N_ROWS) < null_density] = np.nan
+        data[f"Y{i}"] = y
+    input_columns = {
+        "X": Column("X", x_type, "{:,}" if x_type == "number" else None),
+        **{f"Y{i}": Column(f"Y{i}", "number", "{:,}") for i in range(N_SERIES)},
+    }
+    params = {
+        "title": "",
+        "x_axis_label": "",
+        "y_axis_label": "",
+        "x_column": "X",
+        "y_columns": [{"column": f"Y{i}", "color": "#000000"} for i in range(N_SERIES)],
+    }
+    return pd.DataFrame(data), params, input_columns
+
+
+@pytest.mark.parametrize("x_type", ["number", "timestamp"])
+@pytest.mark.parametrize("output_format", ["dict", "json-bytes", "json-chunks"])
+def test_peak_memory_within_documented_multiple(x_type, output_format):
+    table, params, input_columns = build_table(x_type)
+    report = audit_render_memory(
+        table, params, input_columns=input_columns, output_format=output_format
+    )
+    assert report.input_nbytes == table.memory_usage(index=False).sum()
+    assert report.peak_multiple <= PEAK_MEMORY_MULTIPLES[output_format]
+
+
+def test_report_stages_in_start_order():
+    table, params, input_columns = build_table("number")
+    report = audit_render_memory(
+        table, params, input_columns=input_columns, output_format="json-chunks"
+    )
+    assert [stage.name for stage in report.stages] == [
+        "make_chart",
+        "make_x_series_and_mask",
+        "mask_y_columns",
+        "to_vega_json_chunks",
+    ]
+    make_chart = report.stages[0]
+    # make_chart retains the masked X and Y: about one copy of the input
+    assert 0 < make_chart.retained_nbytes <= 1.2 * report.input_nbytes
+    assert make_chart.peak_nbytes <= report.peak_nbytes
+
+
+def test_no_copies_without_nulls():
+    table, params, input_columns = build_table("number", null_density=0)
+    report = audit_render_memory(
+        table, params, input_columns=input_columns, output_format="json-chunks"
+    )
+    assert report.stages[0].retained_nbytes < 0.1 * report.input_nbytes
+
+
+def test_without_reset_peak(monkeypatch):
+    # Python 3.8's tracemalloc has no reset_peak()
+    if hasattr(tracemalloc, "reset_peak"):
+        monkeypatch.delattr(tracemalloc, "reset_peak")
+    table, params, input_columns = build_table("number")
+    report = audit_render_memory(
+        table, params, input_columns=input_columns, output_format="json-chunks"
+    )
+    assert report.peak_multiple <= PEAK_MEMORY_MULTIPLES["json-chunks"]
+    assert [stage.name for stage in report.stages][0] == "make_chart"
+    for stage in report.stages:
+        assert stage.peak_nbytes <= report.peak_nbytes
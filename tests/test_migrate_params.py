@@ -18,6 +18,8 @@ def test_vneg1():
         "y_axis_label": "Y axis",
         "x_column": "X",
         "y_columns": [],
+        "max_points": 0,
+        "downsample": "lttb",
     }
 
 
@@ -37,6 +39,8 @@ def test_v0_empty_y_columns():
         "y_axis_label": "Y axis",
         "x_column": "X",
         "y_columns": [],
+        "max_points": 0,
+        "downsample": "lttb",
     }
 
 
@@ -56,10 +60,12 @@ def test_v0_json_parse():
         "y_axis_label": "Y axis",
         "x_column": "X",
         "y_columns": [{"column": "X", "color": "#111111"}],
+        "max_points": 0,
+        "downsample": "lttb",
     }
 
 
-def test_v1_no_op():
+def test_v1_add_max_points():
     result = migrate_params(
         {
             "title": "Title",
@@ -75,4 +81,51 @@ def test_v1_no_op():
         "y_axis_label": "Y axis",
         "x_column": "X",
         "y_columns": [{"column": "X", "color": "#111111"}],
+        "max_points": 0,
+        "downsample": "lttb",
+    }
+
+
+def test_v2_add_downsample():
+    result = migrate_params(
+        {
+            "title": "Title",
+            "x_axis_label": "X axis",
+            "y_axis_label": "Y axis",
+            "x_column": "X",
+            "y_columns": [{"column": "X", "color": "#111111"}],
+            "max_points": 1000,
+        }
+    )
+    assert result == {
+        "title": "Title",
+        "x_axis_label": "X axis",
+        "y_axis_label": "Y axis",
+        "x_column": "X",
+        "y_columns": [{"column": "X", "color": "#111111"}],
+        "max_points": 1000,
+        "downsample": "lttb",
+    }
+
+
+def test_v3_no_op():
+    result = migrate_params(
+        {
+            "title": "Title",
+            "x_axis_label": "X axis",
+            "y_axis_label": "Y axis",
+            "x_column": "X",
+            "y_columns": [{"column": "X", "color": "#111111"}],
+            "max_points": 1000,
+            "downsample": "m4",
+        }
+    )
+    assert result == {
+        "title": "Title",
+        "x_axis_label": "X axis",
+        "y_axis_label": "Y axis",
+        "x_column": "X",
+        "y_columns": [{"column": "X", "color": "#111111"}],
+        "max_points": 1000,
+        "downsample": "m4",
     }
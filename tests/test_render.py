@@ -2,10 +2,19 @@ import json
 from collections import namedtuple
 
 import pandas as pd
+import pyarrow as pa
 from cjwmodule.testing.i18n import i18n_message
 from pandas.testing import assert_frame_equal
 
-from linechart import render
+import linechart
+from linechart import (
+    ARROW_DATA_URL,
+    Form,
+    RenderCache,
+    render,
+    render_projected,
+    required_columns,
+)
 
 Column = namedtuple("Column", ("name", "type", "format"))
 
@@ -69,3 +78,397 @@ def test_integration():
     assert '"X LABEL"' in text
     assert '"Y LABEL"' in text
     assert '"#123456"' in text
+
+
+def test_integration_temporal_encoding_epoch_ms():
+    table = pd.DataFrame(
+        {"A": pd.to_datetime(["2020-12-07T01:00", "2020-12-14"]), "B": [2, 3]}
+    )
+    result = render(
+        table,
+        {
+            "title": "TITLE",
+            "x_column": "A",
+            "y_columns": [{"column": "B", "color": "#123456"}],
+            "x_axis_label": "X LABEL",
+            "y_axis_label": "Y LABEL",
+        },
+        input_columns={
+            "A": Column("A", "timestamp", None),
+            "B": Column("B", "number", "{:,.2f}"),
+        },
+        temporal_encoding="epoch-ms",
+    )
+    assert result[1] == ""
+    assert result[2]["data"]["values"] == [
+        {"x": 1607302800000, "y0": 2},
+        {"x": 1607904000000, "y0": 3},
+    ]
+
+
+OUTPUT_FORMAT_PARAMS = {
+    "title": 'TITLE "quoted" ü',
+    "x_column": "A",
+    "y_columns": [
+        {"column": "B", "color": "#123456"},
+        {"column": "C", "color": "#654321"},
+    ],
+    "x_axis_label": "",
+    "y_axis_label": "",
+}
+
+
+def _output_format_table(x, x_type):
+    n = len(x)
+    return (
+        pd.DataFrame(
+            {
+                "A": x,
+                "B": pd.Series([0.1, None, 1e20, -3.5, 2][:n], dtype=float),
+                "C": pd.Series([1, 2, 3, 4, 5][:n], dtype="int8"),
+            }
+        ),
+        {
+            "A": Column("A", x_type, "{:,}" if x_type == "number" else None),
+            "B": Column("B", "number", "{:,.2f}"),
+            "C": Column("C", "number", "{:,d}"),
+        },
+    )
+
+
+OUTPUT_FORMAT_XS = [
+    ([1.5, 2.25, 3, 4, 1e-7], "number"),
+    ([3, 1, 2, 5, 4], "number"),
+    (["a", 'b"\\', "c\n", "ü", "e"], "text"),
+    (pd.to_datetime(["2020-12-07T01:00", "2020-12-14", "2021-01-01"]), "timestamp"),
+]
+
+
+def _assert_output_formats_match(monkeypatch, table, input_columns, **kwargs):
+    # Never cache: each output format must run its own path
+    monkeypatch.setattr(linechart, "render_cache", RenderCache(max_entries=0))
+    monkeypatch.setattr(linechart, "chart_data_cache", RenderCache(max_entries=0))
+    kwargs = dict(input_columns=input_columns, **kwargs)
+    _, error, json_dict = render(table, OUTPUT_FORMAT_PARAMS, **kwargs)
+    assert error == ""
+    expected = json.dumps(json_dict).encode("utf-8")
+    _, error, json_bytes = render(
+        table, OUTPUT_FORMAT_PARAMS, output_format="json-bytes", **kwargs
+    )
+    assert error == ""
+    assert json_bytes == expected
+    _, error, chunks = render(
+        table, OUTPUT_FORMAT_PARAMS, output_format="json-chunks", **kwargs
+    )
+    assert error == ""
+    assert b"".join(chunks) == expected
+
+
+def test_output_format_json_bytes_matches_dict(monkeypatch):
+    for x, x_type in OUTPUT_FORMAT_XS:
+        for temporal_encoding in ("iso8601", "epoch-ms"):
+            table, input_columns = _output_format_table(x, x_type)
+            _assert_output_formats_match(
+                monkeypatch, table, input_columns, temporal_encoding=temporal_encoding
+            )
+
+
+def test_output_format_json_bytes_matches_dict_nullable_and_float32(monkeypatch):
+    table, input_columns = _output_format_table([1, 2, 3, 4, 5], "number")
+    for a, b, c in [
+        ("Int64", "float32", "Int64"),
+        ("float32", "Float64", "UInt8"),
+    ]:
+        _assert_output_formats_match(
+            monkeypatch,
+            table.assign(
+                A=table["A"].astype(a),
+                B=table["B"].astype(b),
+                C=table["C"].astype(c).where(table["C"] != 2),
+            ),
+            input_columns,
+        )
+
+
+def test_output_format_json_chunks_streams_rows():
+    table, input_columns = _output_format_table([1, 2, 3, 4, 5], "number")
+    _, _, json_dict = render(table, OUTPUT_FORMAT_PARAMS, input_columns=input_columns)
+    chart = Form.from_params(**OUTPUT_FORMAT_PARAMS).make_chart(table, input_columns)
+    chunks = list(chart.to_vega_json_chunks(rows_per_chunk=2))
+    assert len(chunks) == 5  # head, 3 data chunks, tail
+    assert b"".join(chunks) == json.dumps(json_dict).encode("utf-8")
+
+
+def test_output_format_json_bytes_error():
+    table, input_columns = _output_format_table([1, 2], "number")
+    params = {**OUTPUT_FORMAT_PARAMS, "x_column": ""}
+    for output_format in ("json-bytes", "json-chunks"):
+        _, error, result = render(
+            table, params, input_columns=input_columns, output_format=output_format
+        )
+        assert error == i18n_message("noXAxisError.message")
+        if output_format == "json-chunks":
+            result = b"".join(result)
+        assert json.loads(result) == {
+            "error": "Please correct the error in this step's data or parameters"
+        }
+
+
+def test_arrow_data_path(tmp_path):
+    table = pd.DataFrame(
+        {"A": pd.to_datetime(["2020-12-07T01:00", "2020-12-14"]), "B": [2, None]}
+    )
+    path = tmp_path / "data.arrow"
+    result = render(
+        table,
+        {
+            "title": "TITLE",
+            "x_column": "A",
+            "y_columns": [{"column": "B", "color": "#123456"}],
+            "x_axis_label": "X LABEL",
+            "y_axis_label": "Y LABEL",
+        },
+        input_columns={
+            "A": Column("A", "timestamp", None),
+            "B": Column("B", "number", "{:,.2f}"),
+        },
+        arrow_data_path=path,
+    )
+    assert result[1] == ""
+    assert result[2]["data"] == {
+        "url": ARROW_DATA_URL,
+        "format": {"type": "arrow"},
+    }
+    with pa.ipc.open_stream(path.read_bytes()) as reader:
+        arrow_table = reader.read_all()
+    assert arrow_table.column_names == ["x", "y0"]
+    assert arrow_table.column("x").type == pa.float64()
+    assert arrow_table.to_pydict() == {
+        "x": [1607302800000.0, 1607904000000.0],
+        "y0": [2.0, None],
+    }
+
+
+def test_arrow_data_path_text_x(tmp_path):
+    table = pd.DataFrame({"A": ["a", "b\u00fc"], "B": [1, 2]})
+    path = tmp_path / "data.arrow"
+    result = render(
+        table,
+        {**OUTPUT_FORMAT_PARAMS, "y_columns": [{"column": "B", "color": "#123456"}]},
+        input_columns={
+            "A": Column("A", "text", None),
+            "B": Column("B", "number", "{:,d}"),
+        },
+        arrow_data_path=path,
+        output_format="json-bytes",
+    )
+    assert result[1] == ""
+    assert json.loads(result[2])["data"]["url"] == ARROW_DATA_URL
+    with pa.ipc.open_stream(path.read_bytes()) as reader:
+        assert reader.read_all().to_pydict() == {
+            "x": ["a", "b\u00fc"],
+            "y0": [1.0, 2.0],
+        }
+
+
+def test_arrow_data_path_error_writes_no_file(tmp_path):
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3]})
+    path = tmp_path / "data.arrow"
+    result = render(
+        table,
+        {**OUTPUT_FORMAT_PARAMS, "x_column": ""},
+        input_columns={
+            "A": Column("A", "number", "{:,d}"),
+            "B": Column("B", "number", "{:,d}"),
+        },
+        arrow_data_path=path,
+    )
+    assert result[1] == i18n_message("noXAxisError.message")
+    assert not path.exists()
+
+
+def test_required_columns():
+    assert required_columns(
+        {
+            "title": "",
+            "x_axis_label": "",
+            "y_axis_label": "",
+            "x_column": "A",
+            "y_columns": [
+                {"column": "C", "color": "#123456"},
+                {"column": "B", "color": "#234567"},
+                {"column": "C", "color": "#345678"},
+            ],
+        }
+    ) == ["A", "C", "B"]
+
+
+def test_required_columns_migrates_params():
+    assert required_columns(
+        {
+            "title": "",
+            "x_axis_label": "",
+            "y_axis_label": "",
+            "x_column": "",
+            "x_data_type": 0,
+            "y_columns": '[{"column": "B", "color": "#123456"}]',
+        }
+    ) == ["B"]
+
+
+def test_render_projected():
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3], "C": ["x", "y"], "D": [4, 5]})
+    params = {
+        "title": "TITLE",
+        "x_column": "B",
+        "y_columns": [{"column": "D", "color": "#123456"}],
+        "x_axis_label": "",
+        "y_axis_label": "",
+    }
+    input_columns = {
+        "A": Column("A", "number", "{:,d}"),
+        "B": Column("B", "number", "{:,d}"),
+        "C": Column("C", "text", None),
+        "D": Column("D", "number", "{:,d}"),
+    }
+    projected = table[required_columns(params)]
+    assert list(projected.columns) == ["B", "D"]
+    assert render_projected(projected, params, input_columns=input_columns) == (
+        "",
+        render(table, params, input_columns=input_columns)[2],
+    )
+
+
+def _many_series_table(n_series):
+    table = pd.DataFrame(
+        {"A": [1, 2, 3], **{f"Y{i}": [i, i + 1.0, None] for i in range(n_series)}}
+    )
+    input_columns = {name: Column(name, "number", "{:,}") for name in table.columns}
+    params = {
+        "title": "",
+        "x_column": "A",
+        "y_columns": [
+            {"column": f"Y{i}", "color": "#%06x" % i} for i in range(n_series)
+        ],
+        "x_axis_label": "",
+        "y_axis_label": "",
+    }
+    return table, params, input_columns
+
+
+def test_series_layout_fold():
+    table, params, input_columns = _many_series_table(3)
+    _, _, layers = render(table, params, input_columns=input_columns)
+    _, error, fold = render(
+        table, params, input_columns=input_columns, series_layout="fold"
+    )
+    assert error == ""
+    assert fold["data"] == layers["data"]
+    assert fold["encoding"] == layers["encoding"]  # tooltips list every "yN"
+    assert fold["transform"] == [{"fold": ["y0", "y1", "y2"], "as": ["series", "y"]}]
+    assert [layer["mark"]["type"] for layer in fold["layer"]] == [
+        "line",
+        "rule",
+        "point",
+    ]
+    line, rule, point = fold["layer"]
+    assert line["encoding"]["color"] == {
+        "field": "series",
+        "type": "nominal",
+        "scale": {
+            "domain": ["y0", "y1", "y2"],
+            "range": ["#000000", "#000001", "#000002"],
+        },
+        "legend": layers["layer"][0]["encoding"]["color"]["legend"],
+    }
+    assert rule["selection"]["hover"]["fields"] == ["x"]
+    assert point["encoding"]["fill"]["scale"] == line["encoding"]["color"]["scale"]
+
+
+def test_series_layout_fold_layers_do_not_grow():
+    table, params, input_columns = _many_series_table(40)
+    _, _, layers = render(table, params, input_columns=input_columns)
+    _, _, fold = render(
+        table, params, input_columns=input_columns, series_layout="fold"
+    )
+    assert len(layers["layer"]) == 81
+    assert len(fold["layer"]) == 3
+
+
+def test_series_layout_fold_json_bytes_and_restyle():
+    table, params, input_columns = _many_series_table(2)
+    kwargs = dict(input_columns=input_columns, series_layout="fold")
+    _, _, fold = render(table, params, **kwargs)
+    _, _, json_bytes = render(table, params, output_format="json-bytes", **kwargs)
+    assert json_bytes == json.dumps(fold).encode("utf-8")
+    # Restyled from the chart-data cache: still folded
+    _, _, restyled = render(table, {**params, "title": "New title"}, **kwargs)
+    assert restyled["title"] == "New title"
+    assert "transform" in restyled
+
+
+def test_dense_chart_drops_circles_and_hovers_on_x():
+    n = linechart.ExpectedPlotWidth // linechart.MinPointMarkSpacing + 1
+    table = pd.DataFrame({"A": range(n), "B": range(n)})
+    input_columns = {
+        "A": Column("A", "number", "{:,}"),
+        "B": Column("B", "number", "{:,}"),
+    }
+    params = {
+        **OUTPUT_FORMAT_PARAMS,
+        "y_columns": [{"column": "B", "color": "#123456"}],
+    }
+    _, _, sparse = render(table[:-1], params, input_columns=input_columns)
+    line, rule, point = sparse["layer"]
+    assert line["mark"]["point"] == {"shape": "circle", "size": 36}
+    assert "encodings" not in rule["selection"]["hover"]
+    assert point["encoding"]["opacity"]["condition"] == {
+        "selection": "hover",
+        "value": 1,
+    }
+
+    _, _, dense = render(table, params, input_columns=input_columns)
+    line, rule, point = dense["layer"]
+    assert line["mark"]["point"] is False
+    assert rule["selection"]["hover"]["encodings"] == ["x"]
+    assert rule["selection"]["hover"]["nearest"] is True
+    assert point["transform"] == [{"filter": {"selection": "hover"}}]
+    assert "opacity" not in point["encoding"]
+
+
+def test_dense_chart_counts_every_series():
+    n_rows = 150  # few enough for circles to fit ExpectedPlotWidth
+    assert n_rows * linechart.MinPointMarkSpacing <= linechart.ExpectedPlotWidth
+    table = pd.DataFrame({"A": range(n_rows), "B": range(n_rows)})
+    input_columns = {
+        "A": Column("A", "number", "{:,}"),
+        "B": Column("B", "number", "{:,}"),
+    }
+
+    def make_chart(n_series):
+        params = {
+            **OUTPUT_FORMAT_PARAMS,
+            "y_columns": [{"column": "B", "color": "#123456"}] * n_series,
+        }
+        return Form.from_params(**params).make_chart(table, input_columns)
+
+    assert not make_chart(1).is_dense
+    assert make_chart(linechart.MaxPointMarks // n_rows + 1).is_dense
+
+
+def test_dense_chart_fold_layout():
+    n = linechart.MaxPointMarks
+    table = pd.DataFrame({"A": range(n), "B": range(n), "C": range(n)})
+    input_columns = {
+        "A": Column("A", "number", "{:,}"),
+        "B": Column("B", "number", "{:,}"),
+        "C": Column("C", "number", "{:,}"),
+    }
+    _, _, spec = render(
+        table, OUTPUT_FORMAT_PARAMS, input_columns=input_columns, series_layout="fold"
+    )
+    line, rule, point = spec["layer"]
+    assert line["mark"]["point"] is False
+    assert rule["selection"]["hover"]["encodings"] == ["x"]
+    assert "fields" not in rule["selection"]["hover"]
+    assert point["transform"] == [{"filter": {"selection": "hover"}}]
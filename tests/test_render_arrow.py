@@ -0,0 +1,184 @@
+import datetime
+from collections import namedtuple
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from cjwmodule.testing.i18n import i18n_message
+
+from linechart import render, render_arrow
+
+from .conftest import P
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+
+def assert_same_as_render(arrow_table, pandas_table, params, input_columns):
+    expected = render(pandas_table, params, input_columns=input_columns)
+    result = render_arrow(arrow_table, params, input_columns=input_columns)
+    assert result[0] is arrow_table
+    assert result[1] == expected[1]
+    assert result[2] == expected[2]
+    return result
+
+
+def test_number_x_with_nulls():
+    arrow_table = pa.table(
+        {
+            "A": pa.array([1.0, None, 3.0, float("nan"), 5.0]),
+            "B": pa.array([1, 2, None, 4, 5], pa.int32()),
+            "C": pa.array(["a", "b", "c", "d", "e"]),  # ignored
+        }
+    )
+    result = assert_same_as_render(
+        arrow_table,
+        pd.DataFrame(
+            {"A": [1.0, None, 3.0, None, 5.0], "B": [1.0, 2.0, None, 4.0, 5.0]}
+        ),
+        P(),
+        {"A": Column("A", "number", "{:,}"), "B": Column("B", "number", "{:,d}")},
+    )
+    assert result[2]["data"]["values"] == [
+        {"x": 1.0, "y0": 1.0},
+        {"x": 3.0, "y0": None},
+        {"x": 5.0, "y0": 5.0},
+    ]
+
+
+def test_timestamp_x_multiple_chunks():
+    t1 = datetime.datetime(2020, 12, 7)
+    t2 = datetime.datetime(2020, 12, 14)
+    t3 = datetime.datetime(2020, 12, 21)
+    arrow_table = pa.Table.from_batches(
+        [
+            pa.record_batch(
+                [pa.array([t1, t2], pa.timestamp("ns")), pa.array([1.0, 2.0])],
+                names=["A", "B"],
+            ),
+            pa.record_batch(
+                [pa.array([t3], pa.timestamp("ns")), pa.array([3.0])],
+                names=["A", "B"],
+            ),
+        ]
+    )
+    assert_same_as_render(
+        arrow_table,
+        pd.DataFrame({"A": [t1, t2, t3], "B": [1.0, 2.0, 3.0]}),
+        P(),
+        {"A": Column("A", "timestamp", None), "B": Column("B", "number", "{:,}")},
+    )
+
+
+def test_date_x():
+    d1 = datetime.date(2020, 12, 7)
+    d2 = datetime.date(2020, 12, 14)
+    assert_same_as_render(
+        pa.table({"A": pa.array([d1, None, d2]), "B": pa.array([1.0, 2.0, 3.0])}),
+        pd.DataFrame(
+            {
+                "A": pd.Series(
+                    [d1.isoformat(), None, d2.isoformat()], dtype="period[D]"
+                ),
+                "B": [1.0, 2.0, 3.0],
+            }
+        ),
+        P(),
+        {"A": Column("A", "date", "week"), "B": Column("B", "number", "{:,}")},
+    )
+
+
+def test_dictionary_text_x():
+    assert_same_as_render(
+        pa.table(
+            {
+                "A": pa.array(["a", "b", "a"]).dictionary_encode(),
+                "B": pa.array([1, 2, 3], pa.int8()),
+                "C": pa.array([4.0, None, 6.0]),
+            }
+        ),
+        pd.DataFrame(
+            {
+                "A": pd.Series(["a", "b", "a"], dtype="category"),
+                "B": pd.Series([1, 2, 3], dtype="int8"),
+                "C": [4.0, None, 6.0],
+            }
+        ),
+        P(y_columns=["B", "C"]),
+        {
+            "A": Column("A", "text", None),
+            "B": Column("B", "number", "{:,d}"),
+            "C": Column("C", "number", "{:,}"),
+        },
+    )
+
+
+@pytest.mark.parametrize(
+    "arrow_table,params,message",
+    [
+        (
+            pa.table({"A": [1, 2], "B": [1, 2]}),
+            P(x_column=""),
+            i18n_message("noXAxisError.message"),
+        ),
+        (
+            pa.table({"A": [1, 1], "B": [1, 2]}),
+            P(),
+            i18n_message("onlyOneValueError.message", {"column_name": "A"}),
+        ),
+        (
+            pa.table({"A": pa.array([None, None], pa.float64()), "B": [1, 2]}),
+            P(),
+            i18n_message("noValuesError.message", {"column_name": "A"}),
+        ),
+        (
+            pa.table({"A": [1, 2], "B": [1, 2]}),
+            P(y_columns=[]),
+            i18n_message("noYAxisError.message"),
+        ),
+        (
+            pa.table({"A": [1, 2], "B": ["x", "y"]}),
+            P(),
+            i18n_message("axisNotNumericError.message", {"column_name": "B"}),
+        ),
+        (
+            pa.table({"A": [1, 2, None], "B": [None, None, 3.0]}),
+            P(),
+            i18n_message("emptyAxisError.message", {"column_name": "B"}),
+        ),
+    ],
+)
+def test_errors(arrow_table, params, message):
+    result = render_arrow(
+        arrow_table,
+        params,
+        input_columns={
+            "A": Column("A", "number", "{:,}"),
+            "B": Column(
+                "B",
+                "text" if pa.types.is_string(arrow_table["B"].type) else "number",
+                "{:,}",
+            ),
+        },
+    )
+    assert result[1] == message
+    assert result[2] == {
+        "error": "Please correct the error in this step's data or parameters"
+    }
+
+
+def test_cache_hit_on_equal_arrow_data():
+    input_columns = {
+        "A": Column("A", "number", "{:,}"),
+        "B": Column("B", "number", "{:,}"),
+    }
+    result1 = render_arrow(
+        pa.table({"A": [1, 2], "B": [3.0, 4.0]}), P(), input_columns=input_columns
+    )
+    result2 = render_arrow(
+        pa.table({"A": [1, 2], "B": [3.0, 4.0]}), P(), input_columns=input_columns
+    )
+    assert result2[2] == result1[2]
+    result3 = render_arrow(
+        pa.table({"A": [1, 2], "B": [3.0, 5.0]}), P(), input_columns=input_columns
+    )
+    assert result3[2]["data"]["values"][1]["y0"] == 5.0
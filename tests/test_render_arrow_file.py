@@ -0,0 +1,211 @@
+import datetime
+from collections import namedtuple
+
+import numpy as np
+import pyarrow as pa
+from cjwmodule.testing.i18n import i18n_message
+
+import linechart
+from linechart import _m4_bin_candidates, render_arrow, render_arrow_file
+
+from .conftest import P
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+INPUT_COLUMNS = {
+    "A": Column("A", "number", "{:,}"),
+    "B": Column("B", "number", "{:,}"),
+    "C": Column("C", "number", "{:,}"),
+    "T": Column("T", "text", None),
+}
+
+
+def write_arrow_file(path, table, max_chunksize):
+    with pa.ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table, max_chunksize=max_chunksize)
+    return path
+
+
+def test_same_as_render_arrow_without_downsampling(tmp_path):
+    table = pa.table(
+        {
+            "A": pa.array([3.0, None, 1.0, 2.0, float("nan"), 5.0, 4.0]),
+            "B": pa.array([1, 2, 3, None, 5, 6, 7], pa.int32()),
+            "C": pa.array([0.5, 1.5, None, 2.5, 3.5, 4.5, 5.5]),
+            "T": pa.array(list("abcdefg")),  # never read
+        }
+    )
+    path = write_arrow_file(tmp_path / "table.arrow", table, 2)
+    params = P(y_columns=["B", "C"])
+    expected = render_arrow(table, params, input_columns=INPUT_COLUMNS)
+    result = render_arrow_file(path, params, input_columns=INPUT_COLUMNS)
+    assert result[0] == path
+    assert result[1] == ""
+    assert result[2] == expected[2]
+
+
+def test_timestamp_x(tmp_path):
+    t0 = datetime.datetime(2020, 12, 7)
+    table = pa.table(
+        {
+            "A": pa.array(
+                [t0 + datetime.timedelta(days=i) for i in range(6)], pa.timestamp("ns")
+            ),
+            "B": pa.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0]),
+        }
+    )
+    path = write_arrow_file(tmp_path / "table.arrow", table, 4)
+    input_columns = {**INPUT_COLUMNS, "A": Column("A", "timestamp", None)}
+    expected = render_arrow(table, P(), input_columns=input_columns)
+    result = render_arrow_file(path, P(), input_columns=input_columns)
+    assert result[2] == expected[2]
+
+
+def test_downsample_batches_keeps_spikes(tmp_path):
+    n = 100_000
+    x = np.random.default_rng(0).permutation(n)  # every batch spans all bins
+    y = np.sin(x / 1000.0)
+    y[x == 12_345] = 50.0
+    y[x == 87_654] = -50.0
+    table = pa.table({"A": pa.array(x), "B": pa.array(y)})
+    path = write_arrow_file(tmp_path / "table.arrow", table, 1_000)
+    result = render_arrow_file(
+        path,
+        P(max_points=200, downsample="m4"),
+        input_columns=INPUT_COLUMNS,
+    )
+    assert result[1] == ""
+    values = result[2]["data"]["values"]
+    assert len(values) <= 200 + 2
+    assert {"x": 12_345, "y0": 50.0} in values
+    assert {"x": 87_654, "y0": -50.0} in values
+    assert min(v["x"] for v in values) == 0
+    assert max(v["x"] for v in values) == n - 1
+
+
+def test_downsample_m4_same_as_render_arrow_odd_max_points(tmp_path):
+    n = 5_000
+    rng = np.random.default_rng(0)
+    table = pa.table(
+        {
+            "A": pa.array(rng.permutation(n) * 0.5),
+            "B": pa.array(rng.normal(size=n)),
+            "C": pa.array(rng.normal(size=n)),
+        }
+    )
+    path = write_arrow_file(tmp_path / "table.arrow", table, 700)
+    params = P(y_columns=["B", "C"], max_points=38, downsample="m4")
+    expected = render_arrow(table, params, input_columns=INPUT_COLUMNS)
+    result = render_arrow_file(path, params, input_columns=INPUT_COLUMNS)
+    assert result[2] == expected[2]
+
+
+def test_downsample_m4_same_as_render_arrow_y_nulls_at_ends(tmp_path):
+    n = 5_000
+    rng = np.random.default_rng(0)
+    b = rng.normal(size=n)
+    b[:700] = np.nan
+    b[-300:] = np.nan
+    table = pa.table(
+        {
+            "A": pa.array(np.arange(n)),
+            "B": pa.array(b, from_pandas=True),
+            "C": pa.array(rng.normal(size=n)),
+        }
+    )
+    path = write_arrow_file(tmp_path / "table.arrow", table, 1_000)
+    params = P(y_columns=["B", "C"], max_points=40, downsample="m4")
+    expected = render_arrow(table, params, input_columns=INPUT_COLUMNS)
+    result = render_arrow_file(path, params, input_columns=INPUT_COLUMNS)
+    assert result[2] == expected[2]
+
+
+def test_downsample_lttb_bounds_points(tmp_path):
+    n = 50_000
+    table = pa.table({"A": pa.array(np.arange(n) * 0.5), "B": pa.array(np.arange(n))})
+    path = write_arrow_file(tmp_path / "table.arrow", table, 3_000)
+    result = render_arrow_file(
+        path, P(max_points=100, downsample="lttb"), input_columns=INPUT_COLUMNS
+    )
+    values = result[2]["data"]["values"]
+    assert len(values) <= 100 + 2
+    assert values[0] == {"x": 0.0, "y0": 0}
+    assert values[-1] == {"x": (n - 1) * 0.5, "y0": n - 1}
+
+
+def test_downsample_lttb_same_as_render_arrow(tmp_path):
+    n = 20_000
+    rng = np.random.default_rng(0)
+    table = pa.table(
+        {
+            "A": pa.array(np.arange(n) * 0.5),
+            "B": pa.array(rng.normal(size=n).cumsum()),
+            "C": pa.array(rng.normal(size=n)),
+        }
+    )
+    path = write_arrow_file(tmp_path / "table.arrow", table, 1_000)
+    params = P(y_columns=["B", "C"], max_points=100, downsample="lttb")
+    expected = render_arrow(table, params, input_columns=INPUT_COLUMNS)
+    result = render_arrow_file(path, params, input_columns=INPUT_COLUMNS)
+    assert result[2] == expected[2]
+
+
+def test_too_many_text_values_counted_across_batches(tmp_path):
+    n = linechart.MaxNAxisLabels + 1
+    table = pa.table(
+        {"T": pa.array([str(i) for i in range(n)]), "B": pa.array(np.arange(n))}
+    )
+    path = write_arrow_file(tmp_path / "table.arrow", table, 100)
+    result = render_arrow_file(path, P(x_column="T"), input_columns=INPUT_COLUMNS)
+    assert result[1] == i18n_message(
+        "tooManyTextValuesError.message", {"x_column": "T", "n_safe_x_values": n}
+    )
+
+
+def test_metadata_errors_before_data_errors(tmp_path):
+    table = pa.table({"A": pa.array([1, 1, 1]), "T": pa.array(["a", "b", "c"])})
+    path = write_arrow_file(tmp_path / "table.arrow", table, 2)
+    result = render_arrow_file(path, P(y_columns=["T"]), input_columns=INPUT_COLUMNS)
+    assert result[1] == i18n_message(
+        "axisNotNumericError.message", {"column_name": "T"}
+    )
+
+
+def test_x_data_errors_before_y_data_errors(tmp_path):
+    table = pa.table({"A": pa.array([1, 1, 1]), "B": pa.array(["a", "b", "c"])})
+    path = write_arrow_file(tmp_path / "table.arrow", table, 2)
+    result = render_arrow_file(path, P(), input_columns=INPUT_COLUMNS)
+    assert result[1] == i18n_message("onlyOneValueError.message", {"column_name": "A"})
+
+
+def test_y_not_numeric(tmp_path):
+    table = pa.table({"A": pa.array([1, 2, 3]), "T": pa.array(["a", "b", "c"])})
+    path = write_arrow_file(tmp_path / "table.arrow", table, 2)
+    result = render_arrow_file(path, P(y_columns=["T"]), input_columns=INPUT_COLUMNS)
+    assert result[1] == i18n_message(
+        "axisNotNumericError.message", {"column_name": "T"}
+    )
+
+
+def test_m4_bin_candidates_merge():
+    rng = np.random.default_rng(0)
+    x = rng.permutation(10_000).astype(np.float64)
+    ys = [rng.normal(size=10_000), rng.normal(size=10_000)]
+    ys[1][::3] = np.nan
+    whole = _m4_bin_candidates(x, ys, 0, 9_999, 50)
+
+    parts = []
+    for start in range(0, 10_000, 3_000):
+        rows = start + _m4_bin_candidates(
+            x[start : start + 3_000],
+            [y[start : start + 3_000] for y in ys],
+            0,
+            9_999,
+            50,
+        )
+        parts.append(rows)
+    merged_rows = np.concatenate(parts)
+    merged = merged_rows[
+        _m4_bin_candidates(x[merged_rows], [y[merged_rows] for y in ys], 0, 9_999, 50)
+    ]
+    assert sorted(merged) == sorted(whole)
@@ -0,0 +1,272 @@
+import json
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from cjwmodule.testing.i18n import i18n_message
+
+import linechart
+from linechart import RenderCache, render
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+PARAMS = {
+    "title": "TITLE",
+    "x_column": "A",
+    "y_columns": [{"column": "B", "color": "#123456"}],
+    "x_axis_label": "X LABEL",
+    "y_axis_label": "Y LABEL",
+}
+INPUT_COLUMNS = {
+    "A": Column("A", "number", "{:,d}"),
+    "B": Column("B", "number", "{:,.2f}"),
+    "C": Column("C", "text", None),
+}
+
+
+def test_cache_hit(empty_render_cache):
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3], "C": ["x", "y"]})
+    result1 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    result2 = render(table.copy(), PARAMS, input_columns=INPUT_COLUMNS)
+    assert result2[2] == result1[2]
+    assert empty_render_cache.misses == 1
+    assert empty_render_cache.hits == 1
+
+
+def test_cache_hit_unaffected_by_caller_modifying_spec(empty_render_cache):
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3]})
+    result1 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    expected = json.loads(json.dumps(result1[2]))
+    result1[2]["title"] = "MODIFIED"
+    result1[2]["config"]["axisY"]["format"] = "MODIFIED"
+    result1[2]["data"]["values"][0]["y0"] = 999
+    result1[2]["data"]["values"].append({"x": 3, "y0": 4})
+    result2 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    assert empty_render_cache.hits == 1
+    assert result2[2] == expected
+    result2[2]["data"]["values"].clear()
+    assert render(table, PARAMS, input_columns=INPUT_COLUMNS)[2] == expected
+
+
+def test_cached_error_unaffected_by_caller_modifying_spec(empty_render_cache):
+    table = pd.DataFrame({"A": [1, 1], "B": [2, 3]})
+    result1 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    assert result1[1]
+    result1[2]["error"] = "MODIFIED"
+    result2 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    assert result2[2] == linechart._ERROR_JSON
+
+
+def test_cache_miss_when_data_changes(empty_render_cache):
+    result1 = render(
+        pd.DataFrame({"A": [1, 2], "B": [2, 3]}), PARAMS, input_columns=INPUT_COLUMNS
+    )
+    result2 = render(
+        pd.DataFrame({"A": [1, 2], "B": [2, 4]}), PARAMS, input_columns=INPUT_COLUMNS
+    )
+    assert result2[2]["data"]["values"] != result1[2]["data"]["values"]
+    assert empty_render_cache.misses == 2
+
+
+def test_cache_ignores_unused_columns(empty_render_cache):
+    render(
+        pd.DataFrame({"A": [1, 2], "B": [2, 3], "C": ["x", "y"]}),
+        PARAMS,
+        input_columns=INPUT_COLUMNS,
+    )
+    render(
+        pd.DataFrame({"A": [1, 2], "B": [2, 3], "C": ["z", "z"]}),
+        PARAMS,
+        input_columns=INPUT_COLUMNS,
+    )
+    assert empty_render_cache.hits == 1
+
+
+def test_cache_miss_when_params_change(empty_render_cache):
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3]})
+    render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    result = render(
+        table, {**PARAMS, "title": "NEW TITLE"}, input_columns=INPUT_COLUMNS
+    )
+    assert result[2]["title"] == "NEW TITLE"
+    assert empty_render_cache.misses == 2
+
+
+def test_presentation_change_reuses_data(empty_chart_data_cache, monkeypatch):
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3]})
+    result1 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("make_chart() should not be called")
+
+    monkeypatch.setattr(linechart.Form, "make_chart", fail)
+    result2 = render(
+        table,
+        {
+            **PARAMS,
+            "title": "NEW TITLE",
+            "x_axis_label": "",
+            "y_axis_label": "NEW Y",
+            "y_columns": [{"column": "B", "color": "#654321"}],
+        },
+        input_columns=INPUT_COLUMNS,
+    )
+    assert empty_chart_data_cache.hits == 1
+    assert result2[2]["data"] == result1[2]["data"]
+    assert result2[2]["title"] == "NEW TITLE"
+    assert result2[2]["encoding"]["x"]["axis"]["title"] == "A"
+    assert result2[2]["encoding"]["y"]["title"] == "NEW Y"
+    assert '"#654321"' in json.dumps(result2[2])
+    assert '"#123456"' not in json.dumps(result2[2])
+
+
+def test_restyled_spec_has_its_own_data(empty_chart_data_cache):
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3]})
+    result1 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    result1[2]["data"]["values"][0]["y0"] = 999
+    result2 = render(
+        table, {**PARAMS, "title": "NEW TITLE"}, input_columns=INPUT_COLUMNS
+    )
+    assert empty_chart_data_cache.hits == 1
+    assert result2[2]["data"] is not result1[2]["data"]
+    assert result2[2]["data"] == {"values": [{"x": 1, "y0": 2}, {"x": 2, "y0": 3}]}
+    result2[2]["data"]["values"].clear()
+    result3 = render(
+        table, {**PARAMS, "title": "NEWER TITLE"}, input_columns=INPUT_COLUMNS
+    )
+    assert result3[2]["data"] == {"values": [{"x": 1, "y0": 2}, {"x": 2, "y0": 3}]}
+
+
+def test_data_param_change_misses_data_cache(empty_chart_data_cache):
+    table = pd.DataFrame({"A": [1, 2, 3], "B": [2, 3, 4], "C": [5, 6, 7]})
+    input_columns = {**INPUT_COLUMNS, "C": Column("C", "number", "{:,}")}
+    render(table, PARAMS, input_columns=input_columns)
+    result = render(
+        table,
+        {**PARAMS, "y_columns": [{"column": "C", "color": "#123456"}]},
+        input_columns=input_columns,
+    )
+    assert empty_chart_data_cache.hits == 0
+    assert result[2]["data"]["values"][0] == {"x": 1, "y0": 5}
+
+
+def test_presentation_change_keeps_temporal_encoding():
+    table = pd.DataFrame(
+        {"A": pd.to_datetime(["2020-01-06", "2020-01-13"]), "B": [2, 3]}
+    )
+    input_columns = {**INPUT_COLUMNS, "A": Column("A", "timestamp", None)}
+    render(table, PARAMS, input_columns=input_columns, temporal_encoding="epoch-ms")
+    result = render(
+        table,
+        {**PARAMS, "title": "NEW TITLE"},
+        input_columns=input_columns,
+        temporal_encoding="epoch-ms",
+    )
+    assert result[2]["encoding"]["x"]["axis"]["values"][0] == 1578268800000
+
+
+def test_cache_miss_when_column_format_changes(empty_render_cache):
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3]})
+    render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    result = render(
+        table,
+        PARAMS,
+        input_columns={**INPUT_COLUMNS, "B": Column("B", "number", "{:,d}")},
+    )
+    assert result[2]["config"]["axisY"]["format"] == ",d"
+
+
+def test_cache_text_x(empty_render_cache):
+    params = {**PARAMS, "x_column": "C"}
+    render(
+        pd.DataFrame({"B": [2, 3], "C": ["x", "y"]}),
+        params,
+        input_columns=INPUT_COLUMNS,
+    )
+    result = render(
+        pd.DataFrame({"B": [2, 3], "C": ["x", "z"]}),
+        params,
+        input_columns=INPUT_COLUMNS,
+    )
+    assert result[2]["data"]["values"][1]["x"] == "z"
+    assert empty_render_cache.hits == 0
+
+
+def test_cache_error(empty_render_cache):
+    table = pd.DataFrame({"A": [1, 1], "B": [2, 3]})
+    render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    result = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    assert result[1] == i18n_message("onlyOneValueError.message", {"column_name": "A"})
+    assert empty_render_cache.hits == 1
+
+
+def test_metadata_error_skips_fingerprint(empty_render_cache, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("fingerprint should not be computed")
+
+    monkeypatch.setattr(linechart, "_fingerprint_columns", fail)
+    table = pd.DataFrame({"A": [1, 2], "B": [2, 3], "C": ["x", "y"]})
+    for output_format in ("dict", "json-bytes", "json-chunks"):
+        result = render(
+            table,
+            {**PARAMS, "y_columns": [{"column": "C", "color": "#123456"}]},
+            input_columns=INPUT_COLUMNS,
+            output_format=output_format,
+        )
+        assert result[1] == i18n_message(
+            "axisNotNumericError.message", {"column_name": "C"}
+        )
+        if output_format == "json-chunks":
+            assert json.loads(b"".join(result[2])) == linechart._ERROR_JSON
+        elif output_format == "json-bytes":
+            assert json.loads(result[2]) == linechart._ERROR_JSON
+        else:
+            assert result[2] == linechart._ERROR_JSON
+    assert len(empty_render_cache) == 0
+
+
+def test_lru_evicts_oldest_entry():
+    cache = RenderCache(max_entries=2)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.get("a")
+    cache.put("c", 3, 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_evicts_by_size():
+    cache = RenderCache(max_bytes=25)
+    cache.put("a", 1, 10)
+    cache.put("b", 2, 10)
+    cache.put("c", 3, 10)
+    assert cache.get("a") is None
+    assert cache.nbytes == 20
+    cache.put("huge", 4, 26)
+    assert cache.get("huge") is None
+    assert cache.nbytes == 20
+
+
+def test_lru_disabled():
+    cache = RenderCache(max_entries=0)
+    cache.put("a", 1, 10)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_replace_entry():
+    cache = RenderCache()
+    cache.put("a", 1, 10)
+    cache.put("a", 2, 20)
+    assert cache.get("a") == 2
+    assert cache.nbytes == 20
+
+
+def test_large_table_cache_hit(empty_render_cache):
+    table = pd.DataFrame({"A": np.arange(10000), "B": np.random.rand(10000)})
+    result1 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    result2 = render(table, PARAMS, input_columns=INPUT_COLUMNS)
+    assert result1[2] == result2[2]
+    assert 0 < empty_render_cache.nbytes < 256 * 1024 * 1024
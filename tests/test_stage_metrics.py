@@ -0,0 +1,130 @@
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from linechart import Form, StageMetrics, YColumn, render
+
+from .conftest import P
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+INPUT_COLUMNS = {
+    "A": Column("A", "number", "{:,}"),
+    "B": Column("B", "number", "{:,}"),
+    "C": Column("C", "number", "{:,}"),
+}
+TABLE = pd.DataFrame(
+    {"A": [1.0, None, 3.0, 4.0], "B": [1.0, 2.0, None, 4.0], "C": [5.0, 6.0, 7.0, 8.0]}
+)
+
+
+def collect(**kwargs):
+    metrics = []
+    result = render(
+        TABLE,
+        P(y_columns=["B", "C"]),
+        input_columns=INPUT_COLUMNS,
+        on_stage=metrics.append,
+        **kwargs
+    )
+    return result, {m.stage: m for m in metrics}, [m.stage for m in metrics]
+
+
+def test_dict_stages():
+    result, metrics, order = collect()
+    assert order == [
+        "make_x_series_and_mask",
+        "mask_y_columns",
+        "make_chart",
+        "to_vega_data",
+        "to_vega",
+        "render",
+    ]
+    assert all(isinstance(m, StageMetrics) and m.seconds >= 0 for m in metrics.values())
+    assert metrics["make_x_series_and_mask"].info == {"rows_in": 4, "rows_out": 3}
+    assert metrics["mask_y_columns"].info == {"n_series": 2, "rows_out": 3}
+    assert metrics["make_chart"].info == {"rows_out": 3, "n_series": 2}
+    assert metrics["to_vega_data"].info == {"n_series": 2, "n_rows": 3, "n_points": 5}
+    assert metrics["render"].seconds >= metrics["make_chart"].seconds
+
+
+def test_json_bytes_reports_nbytes():
+    result, metrics, order = collect(output_format="json-bytes")
+    assert metrics["to_vega_json_chunks"].info["nbytes"] == len(result[2])
+
+
+def test_json_chunks_reported_when_consumed():
+    metrics = []
+    _, _, chunks = render(
+        TABLE,
+        P(y_columns=["B", "C"]),
+        input_columns=INPUT_COLUMNS,
+        output_format="json-chunks",
+        on_stage=metrics.append,
+    )
+    assert metrics[-1].stage == "render"
+    json_bytes = b"".join(chunks)
+    assert metrics[-1].stage == "to_vega_json_chunks"
+    assert metrics[-1].info == {"nbytes": len(json_bytes)}
+
+
+def test_downsample_rows():
+    metrics = []
+    render(
+        pd.DataFrame({"A": range(1000), "B": range(1000)}),
+        {
+            **P(y_columns=["B", "C"], max_points=100, downsample="lttb"),
+            "y_columns": [{"column": "B", "color": "#123456"}],
+        },
+        input_columns=INPUT_COLUMNS,
+        on_stage=metrics.append,
+    )
+    (downsample,) = [m for m in metrics if m.stage == "downsample"]
+    assert downsample.info == {"rows_in": 1000, "rows_out": 100}
+
+
+def test_cache_hit_skips_stages():
+    render(TABLE, P(y_columns=["B", "C"]), input_columns=INPUT_COLUMNS)
+    result, metrics, order = collect()
+    assert order == ["to_vega", "render"]  # just the spec shell
+
+
+def test_other_threads_not_observed():
+    metrics = []
+    thread_done = threading.Event()
+
+    def render_elsewhere():
+        render(
+            TABLE, P(y_columns=["B", "C"], title="other"), input_columns=INPUT_COLUMNS
+        )
+        thread_done.set()
+
+    def on_stage(m):
+        metrics.append(m)
+        if m.stage == "make_chart":
+            thread = threading.Thread(target=render_elsewhere)
+            thread.start()
+            thread.join()
+
+    render(
+        TABLE, P(y_columns=["B", "C"]), input_columns=INPUT_COLUMNS, on_stage=on_stage
+    )
+    assert thread_done.is_set()
+    assert [m.stage for m in metrics].count("to_vega") == 1
+
+
+def test_chart_to_vega_on_stage():
+    form = Form(
+        title="",
+        x_axis_label="",
+        y_axis_label="",
+        x_column="A",
+        y_columns=[YColumn("B", "#123456")],
+    )
+    chart = form.make_chart(TABLE, INPUT_COLUMNS)
+    metrics = []
+    spec = chart.to_vega(on_stage=metrics.append)
+    assert spec == chart.to_vega()
+    assert [m.stage for m in metrics] == ["to_vega_data", "to_vega"]
+    assert metrics[0].info["n_points"] == 2
@@ -0,0 +1,70 @@
+import json
+import re
+from collections import namedtuple
+from pathlib import Path
+
+import pandas as pd
+
+from linechart import THEME, THEME_VERSION, render
+
+from .conftest import P
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+TABLE = pd.DataFrame({"A": [1, 2], "B": [3, 4], "C": [5, 6]})
+INPUT_COLUMNS = {
+    "A": Column("A", "number", "{:,}"),
+    "B": Column("B", "number", "{:,d}"),
+    "C": Column("C", "number", "{:,d}"),
+}
+
+
+def test_html_ships_same_theme():
+    html = (Path(__file__).parent.parent / "linechart.html").read_text()
+    version = re.search(r"const ThemeVersion = (\d+)\n", html).group(1)
+    theme = re.search(r"const Theme = (\{.*?\n      \})\n", html, re.S).group(1)
+    assert int(version) == THEME_VERSION
+    assert json.loads(theme) == THEME
+
+
+def test_client_theme_sends_only_per_chart_config():
+    _, _, spec = render(TABLE, P(), input_columns=INPUT_COLUMNS, theme="client")
+    assert spec["config"] == {"axisY": {"format": ",d", "tickMinStep": 1}}
+    assert spec["usermeta"]["theme"] == THEME_VERSION
+
+
+def test_inline_theme_is_theme_plus_client_config():
+    for y_columns in (["B"], ["B", "C"]):
+        _, _, inline = render(
+            TABLE, P(y_columns=y_columns), input_columns=INPUT_COLUMNS
+        )
+        _, _, client = render(
+            TABLE, P(y_columns=y_columns), input_columns=INPUT_COLUMNS, theme="client"
+        )
+        assert "usermeta" not in inline
+        merged = {
+            **THEME,
+            **client["config"],
+            "axisY": {**THEME["axisY"], **client["config"]["axisY"]},
+        }
+        if len(y_columns) == 1:
+            del merged["legend"]  # we only send it when there is a legend
+        assert inline["config"] == merged
+        assert {k: v for k, v in inline.items() if k not in ("config", "usermeta")} == {
+            k: v for k, v in client.items() if k not in ("config", "usermeta")
+        }
+
+
+def test_json_bytes_smaller_with_client_theme():
+    _, _, inline = render(
+        TABLE, P(), input_columns=INPUT_COLUMNS, output_format="json-bytes"
+    )
+    _, _, client = render(
+        TABLE,
+        P(),
+        input_columns=INPUT_COLUMNS,
+        output_format="json-bytes",
+        theme="client",
+    )
+    assert len(client) < len(inline) - 300
+    assert json.loads(client)["config"] == {"axisY": {"format": ",d", "tickMinStep": 1}}
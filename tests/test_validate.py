@@ -0,0 +1,47 @@
+from collections import namedtuple
+
+from cjwmodule.testing.i18n import i18n_message
+
+from linechart import validate
+
+from .conftest import P
+
+Column = namedtuple("Column", ("name", "type", "format"))
+
+INPUT_COLUMNS = {
+    "A": Column("A", "number", "{:,}"),
+    "B": Column("B", "number", "{:,}"),
+    "T": Column("T", "text", None),
+}
+
+
+def test_valid():
+    assert validate(P(), INPUT_COLUMNS) == ""
+
+
+def test_no_x():
+    assert validate(P(x_column=""), INPUT_COLUMNS) == i18n_message(
+        "noXAxisError.message"
+    )
+
+
+def test_no_y():
+    assert validate(P(y_columns=[]), INPUT_COLUMNS) == i18n_message(
+        "noYAxisError.message"
+    )
+
+
+def test_y_is_x():
+    assert validate(P(y_columns=["B", "A"]), INPUT_COLUMNS) == i18n_message(
+        "sameAxesError.message", {"column_name": "A"}
+    )
+
+
+def test_y_not_numeric():
+    assert validate(P(y_columns=["T"]), INPUT_COLUMNS) == i18n_message(
+        "axisNotNumericError.message", {"column_name": "T"}
+    )
+
+
+def test_text_x_is_fine():
+    assert validate(P(x_column="T"), INPUT_COLUMNS) == ""
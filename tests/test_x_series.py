@@ -33,6 +33,40 @@ def test_json_compatible_values_timestamp():
     )
 
 
+def test_json_compatible_values_timestamp_fractional_seconds():
+    assert_series_equal(
+        XSeries(
+            pd.Series(
+                [
+                    "1960-01-01T00:00:00.5",
+                    "2020-01-01T01:02:03.000001",
+                    "2020-01-01T01:02:03.000000001",
+                    "2020-01-01T01:02:03",
+                ],
+                dtype="datetime64[ns]",
+            ),
+            Column("timestamp"),
+        ).json_compatible_values,
+        pd.Series(
+            [
+                "1960-01-01T00:00:00.500000Z",
+                "2020-01-01T01:02:03.000001Z",
+                "2020-01-01T01:02:03.000000001Z",
+                "2020-01-01T01:02:03Z",
+            ]
+        ),
+    )
+
+
+def test_json_compatible_values_not_cached_on_host_series():
+    # The series may be the host's own column: it may change in place
+    series = pd.Series(["2020-11-30", "2020-12-07"], dtype="datetime64[ns]")
+    x_series = XSeries(series, Column("timestamp"))
+    assert x_series.json_compatible_values[0] == "2020-11-30T00:00:00Z"
+    series.values[0] = pd.Timestamp("2021-01-01").to_datetime64()
+    assert x_series.json_compatible_values[0] == "2021-01-01T00:00:00Z"
+
+
 def test_json_compatible_values_date():
     assert_series_equal(
         XSeries(
@@ -250,3 +284,83 @@ def test_timestamp_ticks_years():
         ],
         "%Y",
     )
+
+
+def test_timestamp_ticks_quarters():
+    x_series = XSeries(
+        pd.Series(
+            ["2019-10-01", "2020-01-01", "2020-04-01", "2020-07-01", "2020-10-01"],
+            dtype="datetime64[ns]",
+        ),
+        Column("timestamp"),
+    )
+    assert x_series.timestamp_tick_values_and_format == (
+        [
+            datetime.date(2019, 10, 1),
+            datetime.date(2020, 1, 1),
+            datetime.date(2020, 4, 1),
+            datetime.date(2020, 7, 1),
+            datetime.date(2020, 10, 1),
+        ],
+        "Q%q %Y",
+    )
+
+
+def test_timestamp_ticks_days():
+    x_series = XSeries(
+        pd.Series(
+            ["2020-12-01", "2020-12-02", "2020-12-04"],
+            dtype="datetime64[ns]",
+        ),
+        Column("timestamp"),
+    )
+    assert x_series.timestamp_tick_values_and_format == (
+        [
+            datetime.date(2020, 12, 1),
+            datetime.date(2020, 12, 2),
+            datetime.date(2020, 12, 3),
+            datetime.date(2020, 12, 4),
+        ],
+        "%b %-d, %Y",
+    )
+
+
+def test_timestamp_ticks_many_days():
+    # Every 143rd day isn't a nice tick: let Vega pick month starts
+    x_series = XSeries(
+        pd.Series(pd.date_range("2018-01-01", periods=1000, freq="D")),
+        Column("timestamp"),
+    )
+    assert x_series.timestamp_tick_values_and_format is None
+
+
+def test_timestamp_ticks_times_of_day():
+    x_series = XSeries(
+        pd.Series(["2020-12-01", "2020-12-01T01:00"], dtype="datetime64[ns]"),
+        Column("timestamp"),
+    )
+    assert x_series.timestamp_tick_values_and_format is None
+
+
+def test_timestamp_ticks_before_epoch():
+    x_series = XSeries(
+        pd.Series(["1960-01-01", "1965-01-01"], dtype="datetime64[ns]"),
+        Column("timestamp"),
+    )
+    assert x_series.timestamp_tick_values_and_format == (
+        [datetime.date(1960 + i, 1, 1) for i in range(6)],
+        "%Y",
+    )
+
+
+def test_timestamp_ticks_classify_across_chunks():
+    # Several chunks of midnights, then one non-midnight value at the end
+    days = pd.date_range("1700-01-01", periods=6000, freq="MS").repeat(40)
+    x_series = XSeries(pd.Series(days), Column("timestamp"))
+    assert x_series.timestamp_tick_values_and_format[1] == "%b %Y"
+    assert x_series.timestamp_tick_values_and_format[0][-1] == days[-1].date()
+    x_series = XSeries(
+        pd.Series(days.append(pd.DatetimeIndex(["2250-01-01T00:01"]))),
+        Column("timestamp"),
+    )
+    assert x_series.timestamp_tick_values_and_format is None